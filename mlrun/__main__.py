@@ -6,20 +6,130 @@ and executes it with a camera input.
 """
 
 # Global modules
+import json
 import logging
 import sys
+import threading
+from time import perf_counter
+from typing import Dict
 
 # Non-guarded imports
 from cv2 import getTickFrequency, getTickCount, namedWindow, destroyAllWindows  # type: ignore
 from typedconfig.source import IniFileConfigSource
 import click
+import numpy as np  # type: ignore
 
 # Local imports
-from mlrun import strings, config, loader, util  # type: ignore
+from mlrun import bench, strings, config, gating, loader, pipeline, profiling, stats, tiling, tracking  # type: ignore
+from mlrun import startup, util, wire  # type: ignore
 from mlrun.loader import ComponentType
+from mlrun.cameras.base import BaseCamera
+from mlrun.cameras.grabber import GrabberCamera
+from mlrun.engines.base import BaseEngine
+from mlrun.engines.hotswap import HotSwapEngine
+from mlrun.publishers.asynchronous import AsyncPublisher
+from mlrun.publishers.base import BasePublisher
+from mlrun.publishers.fanout import FanOutPublisher
 
 
-@click.command("mlrun")
+def _load_camera(camera_config: config.CameraConfig) -> BaseCamera:
+    """
+    Load, but do not enable, the camera described by a camera section.
+    Args:
+        camera_config: The [camera] or [camera.*] section to load from.
+
+    Returns:
+        The camera instance.
+    """
+    if camera_config.name == "opencv":
+        cam = loader.load_component(ComponentType.CAMERA, camera_config.name)(
+            camera=camera_config.id,
+            width=camera_config.width,
+            height=camera_config.height,
+            fps=camera_config.fps
+        )
+    elif camera_config.name == "file":
+        cam = loader.load_component(ComponentType.CAMERA, camera_config.name)(
+            file=camera_config.file
+        )
+
+    # Grab frames in the background so that only the newest one is ever inferred upon.
+    if camera_config.grab:
+        cam = GrabberCamera(cam)
+    return cam
+
+
+class _DefaultGroup(click.Group):
+    """
+    Command group which falls back to the run command, so that "mlrun CONFIG_FILE" keeps working.
+    """
+
+    def parse_args(self, ctx, args):
+        if args and args[0] not in self.commands and not args[0].startswith("-"):
+            args.insert(0, "run")
+        return super().parse_args(ctx, args)
+
+
+def _load_engine(path: str, engine_config: config.EngineConfig) -> BaseEngine:
+    """
+    Load, but do not enable, an engine.
+    Args:
+        path: The path to the model.
+        engine_config: The [engine] section.
+
+    Returns:
+        The engine instance.
+    """
+    if engine_config.name == "tflite":
+        return loader.load_component(ComponentType.ENGINE, engine_config.name)(
+            path=path,
+            pool_size=engine_config.pool_size,
+            num_threads=engine_config.num_threads,
+            devices=engine_config.devices,
+            mmap=engine_config.mmap
+        )
+    return loader.load_component(ComponentType.ENGINE, engine_config.name)(
+        path=path,
+        optimize=engine_config.optimize,
+        cache=engine_config.cache
+    )
+
+
+def _load_publisher(name: str, publisher_config: config.PublisherConfig) -> BasePublisher:
+    """
+    Load, but do not enable, a publisher.
+    Args:
+        name: The name of the publisher.
+        publisher_config: The [publisher] section. Every publisher picks the keys it needs out of it.
+
+    Returns:
+        The publisher instance.
+    """
+    return loader.load_component(ComponentType.PUBLISHER, name)(
+        team=publisher_config.team,
+        table=publisher_config.table,
+        prefix=publisher_config.prefix,
+        rate=publisher_config.rate,
+        host=publisher_config.host,
+        port=publisher_config.port,
+        path=publisher_config.path,
+        slots=publisher_config.slots,
+        slot_size=publisher_config.slot_size
+    )
+
+
+@click.group("mlrun", cls=_DefaultGroup)
+def cli():
+    """
+    An inference engine for object detection systems.
+    """
+    pass
+
+
+cli.add_command(bench.bench)
+
+
+@cli.command("run")
 @click.argument("config_file", type=click.Path(exists=True))
 def main(config_file: str):
     """
@@ -37,8 +147,17 @@ def main(config_file: str):
     camera_config = loaded_config.camera
     engine_config = loaded_config.engine
     publisher_config = loaded_config.publisher
+    pipeline_config = loaded_config.pipeline
+    stats_config = loaded_config.stats
+    profiler_config = loaded_config.profiler
+    tiling_config = loaded_config.tiling
+    nms_config = loaded_config.nms
+    tracking_config = loaded_config.tracking
+    gate_config = loaded_config.gate
+    startup_config = loaded_config.startup
     show = loaded_config.show
     debug = True if logger_config.max_level == "DEBUG" else False
+    starting = startup.Startup(startup_config.parallel)
 
     #######################################################################################################
     # All things requiring configuration go below here. The configuration isn't loaded before this point. #
@@ -66,81 +185,218 @@ def main(config_file: str):
     if show:
         logger.warning(strings.warning_show_debug)
 
-    # Load the configured camera instance.
-    if camera_config.name == "opencv":
-        cam = loader.load_component(ComponentType.CAMERA, camera_config.name)(
-            camera=camera_config.id,
-            width=camera_config.width,
-            height=camera_config.height,
-            fps=camera_config.fps
-        )
-    elif camera_config.name == "file":
-        cam = loader.load_component(ComponentType.CAMERA, camera_config.name)(
-            file=camera_config.file
-        )
+    # Load the configured camera instances. Named [camera.*] sections take precedence over the plain [camera] one.
+    camera_configs = config.camera_configs(loaded_config, config_file) or {"": camera_config}
+    cameras = {name: _load_camera(section) for name, section in camera_configs.items()}
+    if len(cameras) > 1:
+        logger.info(strings.multiple_cameras.format(count=len(cameras), names=", ".join(cameras)))
 
-    # Enable the camera.
-    cam.enable()
+    def warm_up(target: BaseEngine):
+        # The first inferences allocate buffers and compile kernels; get them out of the way on blank frames.
+        blank = np.zeros((engine_config.height, engine_config.width, 3), dtype=np.uint8)
+        for _ in range(startup_config.warmup):
+            target.invoke_batch(target.preprocess_batch([blank] * len(cameras)))
 
     # Load the configured engine.
-    engine = loader.load_component(ComponentType.ENGINE, engine_config.name)(
-        path=engine_config.path
-    )
-    # Enable the inference engine.
-    engine.enable()
+    engine: BaseEngine
+    if engine_config.hot_swap:
+        # Load other models in the background and switch to them between frames, warmed up.
+        engine = HotSwapEngine(lambda path: _load_engine(path, engine_config), engine_config.path, warm_up,
+                               engine_config.watch_interval, logger)
+    else:
+        engine = _load_engine(engine_config.path, engine_config)
 
-    # Load the configured publisher.
-    publisher = loader.load_component(ComponentType.PUBLISHER, publisher_config.name)(
-        team=publisher_config.team,
-        table=publisher_config.table,
-        prefix=publisher_config.prefix
-    )
-    # Enable the publisher.
-    sd = publisher.enable()
+    # Load the configured publishers. Several comma-separated names fan every value out to all of them.
+    if publisher_config.format not in wire.FORMATS:
+        raise ValueError(strings.error_invalid_wire_format.format(format=publisher_config.format))
+    sinks = [_load_publisher(name.strip(), publisher_config) for name in publisher_config.name.split(",")]
+    publisher = sinks[0] if len(sinks) == 1 else FanOutPublisher(sinks)
+    if publisher_config.asynchronous:
+        # Send from a thread of its own, so that a stalled connection never holds up inference.
+        publisher = AsyncPublisher(publisher)
     prefix: str = publisher_config.prefix
-    if publisher.is_connected():
-        sd.putBoolean(f"{prefix}/enabled", True)
 
-    # Create a new image window if debugging is enabled.
+    def enable_cameras():
+        for cam in cameras.values():
+            cam.enable()
+
+    def enable_publisher():
+        publisher.enable()
+        if publisher.is_connected():
+            publisher.put(f"{prefix}/enabled", True)
+        # Tell the robot how to decode the detections. Values put before connecting are sent once connected.
+        publisher.put(f"{prefix}/schema", "json" if publisher_config.format == "json" else wire.SCHEMA)
+        publisher.flush()
+
+    # Enable the cameras, the inference engine and the publisher, each in its own phase.
+    starting.add("cameras", enable_cameras)
+    starting.add("engine", engine.enable)
+    starting.add("warmup", lambda: warm_up(engine), after=("engine",))
+    starting.add("publisher", enable_publisher)
+    starting.run()
+    logger.info(strings.startup_report.format(report=json.dumps(starting.report())))
+
+    # Create a new image window for each camera if debugging is enabled.
     if show:
-        namedWindow("debug")
+        for name in cameras:
+            namedWindow(name or "debug")
+
+    # Split frames into tiles, or crop them to a region of interest, if configured to.
+    tiler = tiling.Tiler(tiling_config.mode, tiling_config.width or engine_config.width,
+                         tiling_config.height or engine_config.height, tiling_config.overlap, tiling_config.roi,
+                         tiling_config.threshold)
+
+    # Only run the engine on some frames if tracking is enabled, and carry detections forward in between.
+    scheduler = tracking.DetectionScheduler(tracking_config.interval if tracking_config.enabled else 1,
+                                            tracking_config.confidence)
+    trackers = {name: tracking.Tracker(tracking_config.iou_threshold, tracking_config.max_age) for name in cameras}
+    # Reuse the last detections of cameras whose scene has not changed, if motion gating is enabled.
+    gates = {
+        name: gating.MotionGate(gate_config.threshold, (gate_config.width, gate_config.height), gate_config.max_skip)
+        for name in cameras
+    }
+    cached = {name: util.Detections(np.empty(0), np.empty((0, 4)), np.empty(0)) for name in cameras}
+    tracking_lock = threading.Lock()
+
+    # Rolling statistics and detection keys for each camera.
+    pipeline_stats = stats.PipelineStats(stats_config.window)
+    keys = {name: f"{prefix}/{name}/detections" if name else f"{prefix}/detections" for name in cameras}
+    last_report = perf_counter()
+    published: Dict[str, np.ndarray] = {}
+    first_published = False
+    profiler = profiling.Profiler(profiler_config.enabled, pipeline_stats, profiler_config.trace,
+                                  profiler_config.interval, logger.info)
+    if profiler_config.enabled:
+        logger.warning(strings.warning_profiler)
+
+    def paused() -> bool:
+        return bool(publisher.is_connected() and publisher.is_enabled())
+
+    def capture():
+        t1 = getTickCount()
+        with profiler.stage("capture"):
+            frames = [cam.read() for cam in cameras.values()]
+        return t1, frames
+
+    def process(captured):
+        t1, frames = captured
+        with tracking_lock:
+            detect = scheduler.due()
+        if not detect:
+            # Skipped frames are published from the tracks alone.
+            with profiler.stage("postprocess"):
+                with tracking_lock:
+                    predicted = [tracker.predict() for tracker in trackers.values()]
+                t2 = getTickCount()
+                return [
+                    (frame, util.humanize(util.normalize(detections, section.width, section.height,
+                                                         engine_config.width, engine_config.height),
+                                          t1, t2, getTickFrequency()))
+                    for section, frame, detections in zip(camera_configs.values(), frames, predicted)
+                ]
+        if gate_config.enabled:
+            with tracking_lock:
+                changed = [gates[name].changed(frame) for name, frame in zip(cameras, frames)]
+        else:
+            changed = [True] * len(frames)
+        fresh = [frame for frame, change in zip(frames, changed) if change]
+        inferred = []
+        if fresh:
+            # Every camera shares the same engine, so frames (or their tiles) from all of them are batched through it.
+            with profiler.stage("preprocess"):
+                tensors = engine.preprocess_batch(tiler.split(fresh) if tiler.enabled else fresh)
+            with profiler.stage("infer"):
+                inferred = engine.invoke_batch(tensors)
+        t2 = getTickCount()
+        results = []
+        with profiler.stage("postprocess"):
+            if tiler.enabled and fresh:
+                inferred = tiler.join(fresh, inferred, engine_config.min_score)
+            detected = iter(inferred)
+            kept = []
+            for name, section, frame, change in zip(cameras, camera_configs.values(), frames, changed):
+                if change:
+                    filtered = util.filter_confidence(next(detected), engine_config.min_score)
+                    if nms_config.enabled:
+                        filtered = util.non_max_suppression(filtered, nms_config.threshold, nms_config.class_aware)
+                    cached[name] = filtered
+                else:
+                    filtered = cached[name]
+                kept.append(filtered)
+                normalized = util.normalize(filtered, section.width, section.height,
+                                            engine_config.width, engine_config.height)
+                results.append((frame, util.humanize(normalized, t1, t2, getTickFrequency())))
+            if tracking_config.enabled:
+                with tracking_lock:
+                    tracking.update_tracks(list(trackers.values()), scheduler, kept, changed)
+        return results
 
-    # Average FPS counter
-    avg_fps = []
+    def publish(processed):
+        nonlocal last_report, first_published
+        if not first_published:
+            first_published = True
+            logger.info(strings.first_detections.format(seconds=round(perf_counter() - starting.started, 2)))
+        pipeline_stats.fps.add(processed[0][1]["fps"])
+        if isinstance(engine, HotSwapEngine):
+            # Switch models when another one is named under the prefix.
+            engine.request(publisher.requested_model())
+        with profiler.stage("publish"):
+            # Publishers which cannot tell whether a robot is connected always send.
+            connected = publisher.is_connected() is not False
+            for name, (frame, humanized) in zip(cameras, processed):
+                # Only write detections which moved past the tolerance since they were last written.
+                fresh = connected and util.changed(published.get(name), humanized["detections"],
+                                                   publisher_config.tolerance)
+                if fresh:
+                    published[name] = humanized["detections"]
+                util.publish(humanized, fresh, keys[name], publisher.put, debug,
+                             logger.debug, show, frame, pipeline_stats.fps.mean, name or "debug",
+                             publisher_config.format)
+            publisher.flush()
+        profiler.tick()
+        now = perf_counter()
+        if now - last_report >= stats_config.interval:
+            last_report = now
+            summary = pipeline_stats.summary()
+            if publisher_config.asynchronous:
+                summary["publisher"] = {"sent": publisher.sent, "dropped": publisher.dropped}
+            summary = json.dumps(summary)
+            logger.info(strings.stats_report.format(summary=summary))
+            if publisher.is_connected() is not False:
+                publisher.put(f"{prefix}/stats", summary)
 
     try:
-        while True:
-            connected = publisher.is_connected()
-            if connected and sd.getBoolean(f"{prefix}/enabled", False):
-                continue
-            t1 = getTickCount()
-            frame = cam.read()
-            inferred = engine.infer(frame)
-            filtered = util.filter_confidence(inferred, engine_config.min_score)
-            normalized = util.normalize(filtered, camera_config.width, camera_config.height,
-                                        engine_config.width, engine_config.height)
-            humanized = util.humanize(normalized, t1, getTickCount(), getTickFrequency())
-            avg_fps.append(humanized["fps"])
-            util.publish(humanized, connected, f"{prefix}/detections", sd.putString, debug,
-                         logger.debug, show, frame, (sum(avg_fps) / len(avg_fps)))
+        if pipeline_config.enabled:
+            # Capture and inference run on their own threads; publishing stays on this one.
+            pipeline.Pipeline(capture, process, publish, pipeline_config.queue_size, paused,
+                              pipeline_config.workers).run()
+        else:
+            while True:
+                if paused():
+                    continue
+                publish(process(capture()))
 
         logger.info(strings.stopped_nt)
         if publisher.is_connected():
-            sd.putBoolean(f"{prefix}/enabled", False)
+            publisher.put(f"{prefix}/enabled", False)
+            publisher.flush()
     except KeyboardInterrupt:
         logger.warning(strings.stopped_keyboard)
-    except EOFError:
-        logger.info("End of file reached.")
+    except EOFError as e:
+        # Grabbers raise this with a reason when their camera stalls.
+        logger.info(str(e) or "End of file reached.")
     finally:
         if publisher.is_connected():
-            sd.putBoolean(f"{prefix}/enabled", False)
+            publisher.put(f"{prefix}/enabled", False)
+            publisher.flush()
         if show:
             destroyAllWindows()
-        cam.disable()
+        for cam in cameras.values():
+            cam.disable()
         engine.disable()
         publisher.disable()
         sys.exit(0)
 
 
 if __name__ == "__main__":
-    main()
+    cli()
@@ -0,0 +1,342 @@
+"""Offline benchmarks for MLRun.
+
+Runs an engine and the post-processing chain over a synthetic or file-sourced set of frames, without NetworkTables or
+a display, and reports throughput, per-stage latency percentiles, peak memory use and the peak bytes allocated per
+frame. Results are written as JSON so that they can be compared between releases.
+"""
+import functools
+import json
+import platform
+import resource
+import sys
+import time
+import tracemalloc
+from typing import Callable, List, Optional
+
+import click
+import numpy as np  # type: ignore
+
+from mlrun import loader, profiling, sharedframes, strings, util, wire
+from mlrun.loader import ComponentType
+
+
+def load_frames(source: str, count: int, width: int, height: int, seed: int = 0) -> List[np.ndarray]:
+    """
+    Load the frames to benchmark with.
+    Args:
+        source: A video or image file to read frames from. Synthetic frames are generated if empty.
+        count: The largest amount of distinct frames to load.
+        width: The width of synthetic frames, and the width file frames are resized to.
+        height: The height of synthetic frames, and the height file frames are resized to.
+        seed: The seed for synthetic frames. Defaults to zero.
+
+    Returns:
+        A list of BGR frames.
+    """
+    if not source:
+        random = np.random.RandomState(seed)
+        return [random.randint(0, 256, (height, width, 3), dtype=np.uint8) for _ in range(count)]
+    import cv2  # type: ignore
+    capture = cv2.VideoCapture(source)
+    frames = []
+    while len(frames) < count:
+        ret, frame = capture.read()
+        if not ret:
+            break
+        frames.append(cv2.resize(frame, (width, height)))
+    capture.release()
+    if not frames:
+        raise click.BadParameter(strings.bench_no_frames.format(source=source), param_hint="--source")
+    return frames
+
+
+def peak_allocation(function: Callable[[], object]) -> int:
+    """
+    Measure the largest amount of memory a call holds on to at once, beyond what was held before it started.
+
+    Tracemalloc must already be tracing.
+    Args:
+        function: The function to call.
+
+    Returns:
+        The peak in bytes.
+    """
+    if hasattr(tracemalloc, "reset_peak"):
+        tracemalloc.reset_peak()
+    else:
+        # Python versions before 3.9 can only reset the peak by restarting.
+        tracemalloc.stop()
+        tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    function()
+    return tracemalloc.get_traced_memory()[1] - before
+
+
+def peak_rss() -> int:
+    """Return the peak resident set size of this process in kilobytes."""
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports bytes; Linux reports kilobytes.
+    return usage // 1024 if sys.platform == "darwin" else usage
+
+
+def run(engine_name: str, model: str, frames: List[np.ndarray], iterations: int, warmup: int, min_score: float,
+        allocation_frames: int, wire_format: str = "json") -> dict:
+    """
+    Benchmark an engine and the post-processing chain.
+    Args:
+        engine_name: The name of the engine to load.
+        model: The path to the model for the engine.
+        frames: The frames to cycle through.
+        iterations: The amount of frames to time.
+        warmup: The amount of untimed frames to run first.
+        min_score: The confidence threshold for post-processing.
+        allocation_frames: The amount of frames to measure peak allocated bytes over, separately from timing.
+        wire_format: How to encode messages; one of "json", "raw" or "numbers". Defaults to "json".
+
+    Returns:
+        A dictionary of results.
+    """
+    engine = loader.load_component(ComponentType.ENGINE, engine_name)(path=model)
+    engine.enable()
+    height, width = frames[0].shape[:2]
+    profiler = profiling.Profiler(enabled=True, window=max(iterations, 1))
+    sizes = []
+
+    def step(index: int):
+        frame = frames[index % len(frames)]
+        with profiler.stage("preprocess"):
+            tensor = engine.preprocess(frame)
+        with profiler.stage("infer"):
+            detections = engine.invoke(tensor)
+        with profiler.stage("postprocess"):
+            filtered = util.non_max_suppression(util.filter_confidence(detections, min_score), 0.5)
+            normalized = util.normalize(filtered, width, height, width, height)
+            humanized = util.humanize(normalized, 0, 1, 30.0)
+        with profiler.stage("serialize"):
+            if wire_format == "raw":
+                payload = wire.encode(humanized)
+            elif wire_format == "numbers":
+                payload = wire.encode_numbers(humanized)
+            else:
+                payload = json.dumps(util.serialize(humanized))
+        if profiler.enabled:
+            # Number arrays are sent as doubles.
+            sizes.append(8 * len(payload) if wire_format == "numbers" else len(payload))
+
+    try:
+        for i in range(warmup):
+            step(i)
+        profiler.histograms.clear()
+        profiler.maxima.clear()
+        start = time.perf_counter()
+        for i in range(iterations):
+            step(i)
+        elapsed = time.perf_counter() - start
+
+        # Allocated bytes are measured on their own pass, since tracing slows everything down.
+        profiler.enabled = False
+        tracemalloc.start()
+        try:
+            allocations = sorted(peak_allocation(lambda: step(i)) for i in range(allocation_frames))
+            inference_allocations = sorted(
+                peak_allocation(lambda: engine.invoke(engine.preprocess(frames[i % len(frames)])))
+                for i in range(allocation_frames)
+            )
+        finally:
+            tracemalloc.stop()
+    finally:
+        engine.disable()
+
+    return {
+        "engine": engine_name,
+        "model": model,
+        "frame_size": [width, height],
+        "frames": iterations,
+        "fps": round(iterations / elapsed, 2) if elapsed > 0 else 0.0,
+        "wire_format": wire_format,
+        "message_bytes": round(sum(sizes) / len(sizes), 1) if sizes else 0.0,
+        "stages": profiler.report(),
+        "peak_rss_kb": peak_rss(),
+        "allocated_bytes_per_frame": allocations[len(allocations) // 2] if allocations else 0,
+        "allocated_bytes_per_inference": (inference_allocations[len(inference_allocations) // 2]
+                                          if inference_allocations else 0),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "numpy": np.__version__
+    }
+
+
+def _cycle_frames(frames: List[np.ndarray], fps: float) -> Callable[[np.ndarray], None]:
+    position = [0]
+    due = [time.perf_counter()]
+
+    def capture(slot: np.ndarray):
+        # Pace frames like a camera would, rather than spinning on a core the workers need.
+        due[0] += 1 / fps
+        time.sleep(max(0.0, due[0] - time.perf_counter()))
+        slot[...] = frames[position[0] % len(frames)]
+        position[0] += 1
+    return capture
+
+
+def _engine_infer(engine_name: str, model: str) -> Callable[[np.ndarray], object]:
+    engine = loader.load_component(ComponentType.ENGINE, engine_name)(path=model)
+    engine.enable()
+    return lambda frame: engine.invoke(engine.preprocess(frame))
+
+
+def run_processes(engine_name: str, model: str, frames: List[np.ndarray], iterations: int, warmup: int,
+                  workers: int, camera_fps: float = 120.0) -> dict:
+    """
+    Benchmark inference spread over several processes, reading frames from a shared memory ring.
+    Args:
+        engine_name: The name of the engine to load in each worker process.
+        model: The path to the model for the engine.
+        frames: The frames for the capture process to cycle through.
+        iterations: The amount of results to time.
+        warmup: The amount of untimed results to wait for first.
+        workers: The amount of inference processes.
+        camera_fps: The rate the capture process produces frames at. Defaults to 120.
+
+    Returns:
+        A dictionary of results.
+    """
+    published = [0]
+    # The clock starts at the last warmup result, or at the first result without warmup, so that spawning the
+    # processes and loading the engines is never timed.
+    first = max(warmup, 1)
+    marks = {"start": 0.0, "end": 0.0}
+
+    def publish(sequence: int, result: object):
+        published[0] += 1
+        if published[0] == first:
+            marks["start"] = time.perf_counter()
+        if published[0] >= warmup + iterations and not pipeline.stop_event.is_set():
+            marks["end"] = time.perf_counter()
+            pipeline.stop_event.set()
+
+    pipeline = sharedframes.ProcessPipeline(
+        functools.partial(_cycle_frames, frames, camera_fps), functools.partial(_engine_infer, engine_name, model),
+        publish, frames[0].shape, workers
+    )
+    pipeline.run()
+    timed = warmup + iterations - first
+    elapsed = marks["end"] - marks["start"]
+    return {
+        "workers": workers,
+        "fps": round(timed / elapsed, 2) if timed > 0 and elapsed > 0 else 0.0,
+        "dropped": pipeline.dropped
+    }
+
+
+def run_nms(candidates: int, repeats: int, seed: int = 0) -> dict:
+    """
+    Benchmark non-maximum suppression on synthetic, heavily overlapping candidates.
+    Args:
+        candidates: The amount of candidate detections.
+        repeats: The amount of timed runs for each mode.
+        seed: The seed for the candidates. Defaults to zero.
+
+    Returns:
+        A dictionary of results, with the median time in milliseconds for each mode.
+    """
+    random = np.random.RandomState(seed)
+    centres = random.rand(candidates, 2)
+    sizes = random.rand(candidates, 2) * 0.2 + 0.02
+    detections = util.Detections(
+        random.rand(candidates).astype(np.float32),
+        np.clip(np.concatenate([centres - sizes / 2, centres + sizes / 2], axis=1), 0, 1).astype(np.float32),
+        random.randint(0, 3, candidates).astype(np.float32)
+    )
+    results = {"candidates": candidates}
+    for mode, class_aware in (("class_aware", True), ("class_agnostic", False)):
+        timings = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            kept = util.non_max_suppression(detections, 0.5, class_aware)
+            timings.append(time.perf_counter() - start)
+        results[mode] = {"p50": round(1000 * sorted(timings)[len(timings) // 2], 3), "kept": len(kept.scores)}
+    return results
+
+
+def compare(results: dict, baseline: dict) -> List[str]:
+    """
+    Describe how results differ from an earlier run.
+    Args:
+        results: The current results.
+        baseline: The results to compare against.
+
+    Returns:
+        One line per compared measurement.
+    """
+    def change(now: float, then: float) -> str:
+        return f"{then} -> {now} ({100 * (now - then) / then:+.1f}%)" if then else f"{then} -> {now}"
+
+    lines = [f"fps: {change(results['fps'], baseline.get('fps', 0))}"]
+    for name, stage in results["stages"].items():
+        if name in baseline.get("stages", {}):
+            lines.append(f"{name} p50 ms: {change(stage['p50'], baseline['stages'][name]['p50'])}")
+    for mode in ("class_aware", "class_agnostic"):
+        if mode in baseline.get("nms", {}):
+            lines.append(f"nms {mode} p50 ms: {change(results['nms'][mode]['p50'], baseline['nms'][mode]['p50'])}")
+    lines.append(f"message_bytes: {change(results['message_bytes'], baseline.get('message_bytes', 0))}")
+    lines.append(f"peak_rss_kb: {change(results['peak_rss_kb'], baseline.get('peak_rss_kb', 0))}")
+    return lines
+
+
+@click.command("bench")
+@click.option("--engine", "engine_name", default="tflite", show_default=True, help="Engine to benchmark.")
+@click.option("--model", default="models/v3", show_default=True, type=click.Path(exists=True),
+              help="Model directory for the engine.")
+@click.option("--source", default="", help="Video or image file to read frames from. Synthetic frames if omitted.")
+@click.option("--frames", "iterations", default=200, show_default=True, help="Amount of frames to time.")
+@click.option("--warmup", default=10, show_default=True, help="Amount of untimed frames to run first.")
+@click.option("--width", default=1280, show_default=True, help="Frame width.")
+@click.option("--height", default=720, show_default=True, help="Frame height.")
+@click.option("--min-score", default=0.3, show_default=True, help="Confidence threshold for post-processing.")
+@click.option("--allocation-frames", default=20, show_default=True,
+              help="Amount of frames to measure peak allocated bytes over.")
+@click.option("--max-allocation", default=-1, help="Fail if preprocessing and inference hold more than this many "
+                                                   "allocated bytes at peak per frame. Not checked if negative.")
+@click.option("--nms-candidates", default=300, show_default=True,
+              help="Amount of candidates for the non-maximum suppression benchmark.")
+@click.option("--nms-budget", default=5.0, show_default=True,
+              help="Fail if non-maximum suppression takes longer than this many milliseconds. Not checked if negative.")
+@click.option("--processes", default=0, show_default=True,
+              help="Also benchmark this many inference processes reading from a shared memory frame ring.")
+@click.option("--wire-format", default="json", show_default=True, type=click.Choice(wire.FORMATS),
+              help="How to encode messages.")
+@click.option("--output", default="", help="File to write JSON results to.")
+@click.option("--baseline", default="", type=click.Path(), help="Earlier JSON results to compare against.")
+def bench(engine_name: str, model: str, source: str, iterations: int, warmup: int, width: int, height: int,
+          min_score: float, allocation_frames: int, max_allocation: int, nms_candidates: int, nms_budget: float,
+          processes: int, wire_format: str, output: str, baseline: Optional[str]):
+    """
+    Benchmark an engine and post-processing offline.
+    """
+    frames = load_frames(source, min(iterations, 16), width, height)
+    results = run(engine_name, model, frames, iterations, warmup, min_score, allocation_frames, wire_format)
+    results["nms"] = run_nms(nms_candidates, 50)
+    if processes > 0:
+        results["processes"] = run_processes(engine_name, model, frames, iterations, warmup, processes)
+        # Compare against the single-process loop timed above.
+        if results["fps"]:
+            results["processes"]["speedup"] = round(results["processes"]["fps"] / results["fps"], 2)
+    text = json.dumps(results, indent=2, sort_keys=True)
+    click.echo(text)
+    if output:
+        with open(output, "w") as handle:
+            handle.write(text + "\n")
+    if baseline:
+        with open(baseline) as handle:
+            for line in compare(results, json.load(handle)):
+                click.echo(line)
+    if 0 <= max_allocation < results["allocated_bytes_per_inference"]:
+        raise click.ClickException(strings.bench_allocation_exceeded.format(
+            allocated=results["allocated_bytes_per_inference"], limit=max_allocation
+        ))
+    slowest = max(results["nms"]["class_aware"]["p50"], results["nms"]["class_agnostic"]["p50"])
+    if 0 <= nms_budget < slowest:
+        raise click.ClickException(strings.bench_nms_exceeded.format(
+            candidates=nms_candidates, time=slowest, budget=nms_budget
+        ))
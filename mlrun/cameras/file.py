@@ -16,6 +16,7 @@ from mlrun.cameras.base import BaseCamera
 cv2 = None
 
 
+@loader.register(ComponentType.CAMERA)
 class FileCamera(BaseCamera, ABC):
     """
     File-based camera system.
@@ -0,0 +1,116 @@
+"""Background frame grabber for MLRun.
+
+Wraps any other capture device and reads from it continuously on a separate thread, so the driver never buffers stale
+frames while inference is running. Only the newest frame is ever handed back."""
+import threading
+import time
+from abc import ABC
+from typing import NamedTuple, Optional
+
+import numpy as np  # type: ignore
+
+from mlrun import strings
+from mlrun.cameras.base import BaseCamera
+
+
+class Frame(NamedTuple):
+    """A captured frame along with its sequence number and monotonic capture time in seconds."""
+    sequence: int
+    timestamp: float
+    image: np.ndarray
+
+
+class GrabberCamera(BaseCamera, ABC):
+    """
+    Latest-frame grabber around another capture device.
+
+    Frames which are not read before the next one arrives are dropped.
+    """
+
+    def __init__(self, camera: BaseCamera, timeout: float = 5.0):
+        """
+        Initialize the grabber.
+        Args:
+            camera: The capture device to read from.
+            timeout: The longest amount of seconds to wait for a new frame. Defaults to five.
+        """
+        super().__init__(self)
+        self.camera = camera
+        self.timeout = timeout
+        self.dropped = 0
+        self._latest: Optional[Frame] = None
+        self._returned = -1
+        self._error: Optional[BaseException] = None
+        self._condition = threading.Condition()
+        self._running = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def enable(self):
+        """
+        Enable the wrapped device and start grabbing frames.
+        Returns:
+            Nothing.
+        """
+        self.camera.enable()
+        self._running.set()
+        self._thread = threading.Thread(target=self._grab, name="mlrun-grabber", daemon=True)
+        self._thread.start()
+
+    def disable(self):
+        """
+        Stop grabbing frames and disable the wrapped device.
+        Returns:
+            Nothing.
+        """
+        self._running.clear()
+        if self._thread is not None:
+            self._thread.join()
+        self.camera.disable()
+
+    def _grab(self):
+        sequence = 0
+        try:
+            while self._running.is_set():
+                image = self.camera.read()
+                timestamp = time.monotonic()
+                # File cameras return nothing while rewinding.
+                if image is None:
+                    continue
+                with self._condition:
+                    if self._latest is not None and self._latest.sequence > self._returned:
+                        self.dropped += 1
+                    self._latest = Frame(sequence, timestamp, image)
+                    self._condition.notify_all()
+                sequence += 1
+        except BaseException as e:  # noqa
+            with self._condition:
+                self._error = e
+                self._condition.notify_all()
+
+    def read_frame(self) -> Frame:
+        """
+        Return the newest frame which has not been returned yet.
+
+        Waits for the next frame if the newest one was already returned. A frame is never returned twice, so that a
+        stalled camera cannot keep stale detections flowing.
+
+        Raises:
+            EOFError: If no new frame arrived within the timeout.
+        """
+        with self._condition:
+            fresh = self._condition.wait_for(
+                lambda: self._error is not None or (
+                    self._latest is not None and self._latest.sequence > self._returned
+                ),
+                self.timeout
+            )
+            if self._error is not None:
+                raise self._error
+            if not fresh:
+                raise EOFError(strings.grabber_timeout.format(timeout=self.timeout))
+            self._returned = self._latest.sequence
+            return self._latest
+
+    def read(self) -> np.ndarray:
+        """Return the newest frame in compatible way."""
+        return self.read_frame().image
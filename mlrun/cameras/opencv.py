@@ -16,6 +16,7 @@ from mlrun.cameras.base import BaseCamera
 cv2 = None  # type: ignore
 
 
+@loader.register(ComponentType.CAMERA)
 class OpenCVCamera(BaseCamera, ABC):
     """
     OpenCV-based camera system.
@@ -2,16 +2,40 @@
 
 This file defines your configuration for MLRun. When running MLRun, pass a configuration name as the first argument.
 """
+import configparser
+from typing import Dict, Optional
+
 from typedconfig import Config, key, section, group_key
 
 
+# Settings which components read when they are created, before or without a loaded configuration file, by
+# configuration name. They match the files under configs/.
+configurations: Dict[str, Dict[str, Dict[str, str]]] = {
+    "desktop": {"logger": {"name": "colored"}},
+    "jetson": {"logger": {"name": "colored"}},
+}
+
+
+def boolean(value) -> bool:
+    """
+    Cast a configuration value to a boolean.
+    Args:
+        value: A boolean, or a string such as "True", "yes", "on" or "1".
+
+    Returns:
+        The boolean value.
+    """
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in ("1", "true", "yes", "on")
+
+
 @section("logger")
 class LoggerConfig(Config):
     name = key(cast=str)
     max_level = key(cast=str)
 
 
-@section("camera")
 class CameraConfig(Config):
     name = key(cast=str)
     id = key(cast=int)
@@ -19,6 +43,22 @@ class CameraConfig(Config):
     height = key(cast=int)
     fps = key(cast=int)
     file = key(cast=str)
+    grab = key(cast=boolean, required=False, default=False)
+
+
+@section("camera")
+class DefaultCameraConfig(CameraConfig):
+    pass
+
+
+class NamedCameraConfig(CameraConfig):
+    """A [camera.*] section. Keys which it leaves out are taken from the [camera] section."""
+
+    def get_key(self, section_name: str, key_name: str) -> Optional[str]:
+        value = super().get_key(section_name, key_name)
+        if value is None:
+            value = super().get_key("camera", key_name)
+        return value
 
 
 @section("engine")
@@ -28,6 +68,49 @@ class EngineConfig(Config):
     min_score = key(cast=float)
     width = key(cast=int)
     height = key(cast=int)
+    pool_size = key(cast=int, required=False, default=1)
+    num_threads = key(cast=int, required=False, default=0)
+    devices = key(cast=str, required=False, default="")
+    optimize = key(cast=str, required=False, default="none")
+    mmap = key(cast=boolean, required=False, default=True)
+    cache = key(cast=str, required=False, default="")
+    hot_swap = key(cast=boolean, required=False, default=False)
+    watch_interval = key(cast=float, required=False, default=1.0)
+
+
+@section("nms")
+class NMSConfig(Config):
+    enabled = key(cast=boolean, required=False, default=False)
+    threshold = key(cast=float, required=False, default=0.5)
+    class_aware = key(cast=boolean, required=False, default=True)
+
+
+@section("tracking")
+class TrackingConfig(Config):
+    enabled = key(cast=boolean, required=False, default=False)
+    interval = key(cast=int, required=False, default=3)
+    confidence = key(cast=float, required=False, default=0.0)
+    iou_threshold = key(cast=float, required=False, default=0.3)
+    max_age = key(cast=int, required=False, default=10)
+
+
+@section("gate")
+class GateConfig(Config):
+    enabled = key(cast=boolean, required=False, default=False)
+    threshold = key(cast=float, required=False, default=4.0)
+    width = key(cast=int, required=False, default=32)
+    height = key(cast=int, required=False, default=24)
+    max_skip = key(cast=int, required=False, default=30)
+
+
+@section("tiling")
+class TilingConfig(Config):
+    mode = key(cast=str, required=False, default="none")
+    width = key(cast=int, required=False, default=0)
+    height = key(cast=int, required=False, default=0)
+    overlap = key(cast=int, required=False, default=32)
+    roi = key(cast=str, required=False, default="")
+    threshold = key(cast=float, required=False, default=0.5)
 
 
 @section("publisher")
@@ -36,11 +119,72 @@ class PublisherConfig(Config):
     team = key(cast=int)
     table = key(cast=str)
     prefix = key(cast=str)
+    format = key(cast=str, required=False, default="json")
+    rate = key(cast=float, required=False, default=0.0)
+    tolerance = key(cast=float, required=False, default=-1.0)
+    asynchronous = key(cast=boolean, required=False, default=False)
+    host = key(cast=str, required=False, default="127.0.0.1")
+    port = key(cast=int, required=False, default=5800)
+    path = key(cast=str, required=False, default="-")
+    slots = key(cast=int, required=False, default=64)
+    slot_size = key(cast=int, required=False, default=4096)
+
+
+@section("pipeline")
+class PipelineConfig(Config):
+    enabled = key(cast=boolean, required=False, default=False)
+    queue_size = key(cast=int, required=False, default=1)
+    workers = key(cast=int, required=False, default=1)
+
+
+@section("stats")
+class StatsConfig(Config):
+    window = key(cast=int, required=False, default=300)
+    interval = key(cast=float, required=False, default=5.0)
+
+
+@section("profiler")
+class ProfilerConfig(Config):
+    enabled = key(cast=boolean, required=False, default=False)
+    trace = key(cast=str, required=False, default="")
+    interval = key(cast=float, required=False, default=10.0)
+
+
+@section("startup")
+class StartupConfig(Config):
+    parallel = key(cast=boolean, required=False, default=True)
+    warmup = key(cast=int, required=False, default=3)
 
 
 class ConfigObject(Config):
     logger = group_key(LoggerConfig)
-    camera = group_key(CameraConfig)
+    camera = group_key(DefaultCameraConfig)
     engine = group_key(EngineConfig)
+    nms = group_key(NMSConfig)
+    tracking = group_key(TrackingConfig)
+    gate = group_key(GateConfig)
+    tiling = group_key(TilingConfig)
     publisher = group_key(PublisherConfig)
+    pipeline = group_key(PipelineConfig)
+    stats = group_key(StatsConfig)
+    profiler = group_key(ProfilerConfig)
+    startup = group_key(StartupConfig)
     show = key(cast=bool, section_name="debug")
+
+
+def camera_configs(config: ConfigObject, config_file: str) -> Dict[str, CameraConfig]:
+    """
+    Find the named camera sections in a configuration file.
+    Args:
+        config: The loaded configuration.
+        config_file: The path to the INI file it was loaded from.
+
+    Returns:
+        A dictionary from each camera name to its section, in file order. Empty if there are no [camera.*] sections.
+    """
+    parser = configparser.ConfigParser()
+    parser.read(config_file, encoding="utf-8")
+    return {
+        name.partition(".")[2]: NamedCameraConfig(section_name=name, sources=config.config_sources)
+        for name in parser.sections() if name.startswith("camera.")
+    }
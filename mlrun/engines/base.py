@@ -2,10 +2,57 @@
 
 Nothing happens here.
 """
+import os
 from abc import ABC, abstractmethod
+from typing import Any, List, Optional, Tuple
 
 import numpy as np  # type: ignore
 
+from mlrun.util import Detections
+
+
+class ModelFile:
+    """
+    Remembers the identity of a model file on disk, so that engines can tell when it was replaced or rewritten.
+    """
+    def __init__(self, path: str):
+        """
+        Take note of the file as it is now.
+        Args:
+            path: The path to the model file.
+        """
+        self.path = path
+        self.signature = self._stat()
+
+    def _stat(self) -> Tuple[int, int, int, int]:
+        stat = os.stat(self.path)
+        return stat.st_dev, stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+    def current(self) -> Optional[Tuple[int, int, int, int]]:
+        """
+        Get the identity of the file as it is now.
+
+        Returns:
+            The signature the file would be noted with, or None if it is missing.
+        """
+        try:
+            return self._stat()
+        except FileNotFoundError:
+            return None
+
+    def changed(self) -> bool:
+        """
+        Check whether the file differs from when it was noted.
+
+        Returns:
+            True if the file was replaced or modified since. A missing file, such as one in the middle of being
+            replaced, does not count as changed until the new file appears.
+        """
+        try:
+            return self._stat() != self.signature
+        except FileNotFoundError:
+            return False
+
 
 class BaseEngine(ABC):
     """
@@ -27,7 +74,55 @@ class BaseEngine(ABC):
         """Disable the inference engine."""
         pass
 
+    def model_changed(self) -> bool:
+        """
+        Whether the model changed on disk since the engine was enabled.
+
+        Engines which cannot tell never report a change.
+        """
+        return False
+
+    def model_signature(self) -> Optional[Tuple[int, int, int, int]]:
+        """
+        The identity of the model file as it is on disk now, to tell different versions of it apart.
+
+        Engines which cannot tell return None.
+        """
+        return None
+
+    def preprocess(self, image: np.ndarray) -> Any:
+        """
+        Turn an image into whatever the engine is invoked with.
+
+        By default, the image is passed through as-is.
+        """
+        return image
+
     @abstractmethod
-    def infer(self, image: np.ndarray) -> list:
-        """Run inference on an object of some kind."""
+    def invoke(self, tensor: Any) -> Detections:
+        """Run inference on a preprocessed input."""
         pass
+
+    def infer(self, image: np.ndarray) -> Detections:
+        """Run inference on an object of some kind."""
+        return self.invoke(self.preprocess(image))
+
+    def preprocess_batch(self, images: List[np.ndarray]) -> Any:
+        """
+        Turn several images into whatever the engine is invoked with for a batch.
+
+        By default, each image is preprocessed on its own.
+        """
+        return [self.preprocess(image) for image in images]
+
+    def invoke_batch(self, tensors: Any) -> List[Detections]:
+        """
+        Run inference on a preprocessed batch.
+
+        By default, the inputs are inferred upon one after another.
+        """
+        return [self.invoke(tensor) for tensor in tensors]
+
+    def infer_batch(self, images: List[np.ndarray]) -> List[Detections]:
+        """Run inference on several images at once, such as one frame from each camera."""
+        return self.invoke_batch(self.preprocess_batch(images))
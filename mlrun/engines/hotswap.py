@@ -0,0 +1,215 @@
+"""Hot-swappable inferrer wrapper for MLRun.
+
+Wraps the configured engine so that another model can be loaded in the background and switched to between frames,
+without restarting the pipeline. Every preprocessed input remembers the engine which produced it, so a frame which
+straddles a swap is still invoked on the engine it was preprocessed for, and a replaced engine is only disabled once
+every frame in flight on it has finished.
+"""
+import os
+import threading
+from abc import ABC
+from time import perf_counter
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np  # type: ignore
+
+from mlrun import strings
+from mlrun.engines.base import BaseEngine
+from mlrun.util import Detections
+
+
+class _Pinned(NamedTuple):
+    """A preprocessed input, along with the engine it has to be invoked on."""
+    engine: BaseEngine
+    tensor: Any
+
+
+class HotSwapEngine(BaseEngine, ABC):
+    """
+    Switches between models atomically, between frames.
+    """
+
+    def __init__(self, make: Callable[[str], BaseEngine], path: str,
+                 prepare: Optional[Callable[[BaseEngine], None]] = None, watch_interval: float = 0.0,
+                 logger: Any = None):
+        """
+        Initialize the wrapper and the engine for the first model.
+        Args:
+            make: Creates, but does not enable, an engine for the model at a path.
+            path: The path to the first model.
+            prepare: Called on every newly enabled engine before it is switched to, such as to warm it up.
+            watch_interval: Seconds between checks of whether the current model changed on disk, which reload it.
+                A version of the file which fails to load is not retried until the file changes again. Defaults to
+                zero, which does not watch.
+            logger: The logger to report swaps to.
+        """
+        super().__init__()
+        self.make = make
+        self.path = os.path.normpath(path)
+        self.prepare = prepare
+        self.watch_interval = watch_interval
+        self.logger = logger
+        self.engine = make(self.path)
+        self.swaps = 0
+        self._requested = ""
+        self._failed_signature: Optional[Tuple[int, int, int, int]] = None
+        self._in_flight: Dict[BaseEngine, int] = {}
+        self._condition = threading.Condition()
+        self._stop = threading.Event()
+        self._loading: Optional[threading.Thread] = None
+        self._watcher: Optional[threading.Thread] = None
+
+    def enable(self):
+        """
+        Enable the engine for the first model, and start watching it if configured to.
+        """
+        self.engine.enable()
+        if self.watch_interval > 0:
+            self._watcher = threading.Thread(target=self._watch, name="mlrun-model-watch", daemon=True)
+            self._watcher.start()
+
+    def disable(self):
+        """
+        Stop watching, wait for a model being loaded and disable the current engine.
+        """
+        self._stop.set()
+        with self._condition:
+            self._condition.notify_all()
+        for thread in (self._watcher, self._loading):
+            if thread is not None:
+                thread.join()
+        self.engine.disable()
+
+    def model_changed(self) -> bool:
+        """Whether the model of the current engine changed on disk."""
+        return self.engine.model_changed()
+
+    def model_signature(self) -> Optional[Tuple[int, int, int, int]]:
+        """The identity of the model file of the current engine as it is on disk now."""
+        return self.engine.model_signature()
+
+    def swap(self, path: str) -> bool:
+        """
+        Start loading a model in the background, and switch to it once it is enabled and prepared. The model which
+        is in use keeps running until then, and keeps running for good if the new one fails to load.
+        Args:
+            path: The path to the model. May be the path of the current model, to reload it.
+
+        Returns:
+            Whether loading started. It does not while another model is being loaded, or after disabling.
+        """
+        with self._condition:
+            if self._stop.is_set() or (self._loading is not None and self._loading.is_alive()):
+                return False
+            self._loading = threading.Thread(target=self._load, args=(os.path.normpath(path),),
+                                             name="mlrun-model-load", daemon=True)
+            self._loading.start()
+        return True
+
+    def request(self, path: str) -> bool:
+        """
+        Swap to a requested model, such as one named through NetworkTables, unless it is already in use.
+
+        Cheap enough to call on every frame: nothing happens until the request changes, and a request which failed
+        to load is not retried until a different one arrives.
+        Args:
+            path: The path to the model. Relative paths are resolved next to the current model, so "v3tpu" selects
+                models/v3tpu while models/v3 is in use. Empty requests are ignored.
+
+        Returns:
+            Whether loading started.
+        """
+        if not path or path == self._requested:
+            return False
+        resolved = os.path.normpath(os.path.join(os.path.dirname(self.path), path))
+        started = resolved != self.path and self.swap(resolved)
+        # Requests which could not start because another model is loading are retried on the next call.
+        if started or resolved == self.path:
+            self._requested = path
+        return started
+
+    def _load(self, path: str):
+        start = perf_counter()
+        # Note the file before reading it, so that a change during the load is retried.
+        signature = self.engine.model_signature() if path == self.path else None
+        self.logger.info(strings.hot_swap_loading.format(path=path))
+        try:
+            engine = self.make(path)
+            engine.enable()
+            if self.prepare is not None:
+                self.prepare(engine)
+        except BaseException as e:  # noqa
+            # Engines exit when they cannot find their model; that must not take the pipeline down with it.
+            self.logger.error(strings.hot_swap_failed.format(path=path, error=repr(e)))
+            if signature is not None:
+                self._failed_signature = signature
+            return
+        with self._condition:
+            old, self.engine, self.path = self.engine, engine, path
+            self.swaps += 1
+            self._failed_signature = None
+        self.logger.info(strings.hot_swap_switched.format(path=path, seconds=round(perf_counter() - start, 2)))
+        with self._condition:
+            self._condition.wait_for(lambda: self._stop.is_set() or not self._in_flight.get(old))
+            self._in_flight.pop(old, None)
+        old.disable()
+
+    def _watch(self):
+        while not self._stop.wait(self.watch_interval):
+            if not self.engine.model_changed():
+                continue
+            # Reloading the version which failed to load would only fail again.
+            if self._failed_signature is None or self.engine.model_signature() != self._failed_signature:
+                self.swap(self.path)
+
+    def _pin(self) -> BaseEngine:
+        with self._condition:
+            engine = self.engine
+            self._in_flight[engine] = self._in_flight.get(engine, 0) + 1
+        return engine
+
+    def _unpin(self, engine: BaseEngine):
+        with self._condition:
+            self._in_flight[engine] -= 1
+            if not self._in_flight[engine]:
+                self._condition.notify_all()
+
+    def preprocess(self, image: np.ndarray) -> _Pinned:
+        """
+        Preprocess an image on the current engine.
+
+        The frame counts as in flight on that engine until the result is invoked, so results must always be invoked.
+        """
+        engine = self._pin()
+        try:
+            return _Pinned(engine, engine.preprocess(image))
+        except BaseException:
+            self._unpin(engine)
+            raise
+
+    def invoke(self, tensor: _Pinned) -> Detections:
+        """Run inference on the engine the input was preprocessed on."""
+        try:
+            return tensor.engine.invoke(tensor.tensor)
+        finally:
+            self._unpin(tensor.engine)
+
+    def preprocess_batch(self, images: List[np.ndarray]) -> _Pinned:
+        """
+        Preprocess several images on the current engine.
+
+        The batch counts as in flight on that engine until the result is invoked, so results must always be invoked.
+        """
+        engine = self._pin()
+        try:
+            return _Pinned(engine, engine.preprocess_batch(images))
+        except BaseException:
+            self._unpin(engine)
+            raise
+
+    def invoke_batch(self, tensors: _Pinned) -> List[Detections]:
+        """Run inference on the engine the batch was preprocessed on."""
+        try:
+            return tensors.engine.invoke_batch(tensors.tensor)
+        finally:
+            self._unpin(tensors.engine)
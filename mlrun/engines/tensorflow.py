@@ -2,11 +2,13 @@
 
 The default inferrer for MLRun. Also the most complicated.
 """
+import hashlib
 import os
 import sys
 from abc import ABC
 import logging
-from typing import List
+from time import perf_counter
+from typing import List, Optional, Tuple, Union
 
 import cv2  # type: ignore
 import numpy as np  # type: ignore
@@ -14,23 +16,58 @@ import numpy as np  # type: ignore
 from mlrun import strings, loader
 from mlrun.config import configurations
 from mlrun.loader import ComponentType
-from mlrun.engines.base import BaseEngine
+from mlrun.engines.base import BaseEngine, ModelFile
+from mlrun.util import Detections
 
 tf = None  # type: ignore
 
+# The graphs a SavedModel can be compiled into ahead of inference.
+OPTIMIZATIONS = ("none", "frozen", "trt")
+# The outputs every compiled graph keeps; everything they do not depend on is pruned.
+OUTPUTS = ["detection_scores", "detection_boxes", "detection_classes"]
 
+
+def model_hash(path: str) -> str:
+    """
+    Hash the contents of a model directory.
+    Args:
+        path: The path to the directory.
+
+    Returns:
+        The hex SHA-256 digest of the name and contents of every file in it.
+    """
+    digest = hashlib.sha256()
+    for root, directories, files in os.walk(path):
+        directories.sort()
+        for name in sorted(files):
+            file_path = os.path.join(root, name)
+            digest.update(os.path.relpath(file_path, path).encode())
+            with open(file_path, "rb") as handle:
+                for chunk in iter(lambda: handle.read(1 << 20), b""):
+                    digest.update(chunk)
+    return digest.hexdigest()
+
+
+@loader.register(ComponentType.ENGINE)
 class TensorFlowEngine(BaseEngine, ABC):
     """
     A TensorFlow inferrer for MLRun.
     """
-    def __init__(self, path: str = ""):
+    def __init__(self, path: str = "", optimize: str = "none", cache: str = ""):
         """
         Initialize the inference engine.
         Args:
             path: The fully qualified path to the saved model for inference.
+            optimize: What to compile the saved model into before inference: "none" to run it as is, "frozen" for a
+                frozen graph pruned to the detection outputs, or "trt" for a TF-TRT FP16 graph, which falls back to a
+                frozen graph where TensorRT is unavailable. Compiled graphs are cached. Defaults to "none".
+            cache: The directory to cache compiled graphs in. Defaults to ~/.cache/mlrun.
         """
-        global tf
         super().__init__(self)
+        if optimize not in OPTIMIZATIONS:
+            raise ValueError(strings.error_invalid_optimize.format(mode=optimize))
+        self.optimize = optimize
+        self.cache = cache or os.path.join(os.path.expanduser("~"), ".cache", "mlrun")
         # noinspection PyTypeChecker
         self.logger_name: str = configurations["desktop"]["logger"]["name"]
         self.logger = loader.load_component(
@@ -47,6 +84,19 @@ class TensorFlowEngine(BaseEngine, ABC):
         else:
             self.logger.error(strings.tensorflow_model_missing)
             sys.exit(1)
+        # TensorFlow is only imported by enable, so that importing it overlaps with the other start-up phases.
+        self.graph = None
+        self.session = None
+        self.raw_input = False
+        self.model_file: Optional[ModelFile] = None
+
+    def enable(self):
+        """
+        Import TensorFlow, create the session and load the model into it.
+        Returns:
+            Nothing.
+        """
+        global tf
         # Disable TensorFlow deprecation warnings.
         try:
             # noinspection PyUnresolvedReferences
@@ -64,18 +114,88 @@ class TensorFlowEngine(BaseEngine, ABC):
             sys.exit(1)
         self.graph = tf.Graph()  # type: ignore
         self.session = tf.Session(graph=self.graph)  # type:ignore
+        self.session.__enter__()
+        self.logger.info(strings.tensorflow_loading_model)
+        self.model_file = ModelFile(self.model_path + "/saved_model.pb")
+        if self.optimize == "none":
+            tf.saved_model.loader.load(self.session, ["serve"], self.model_path)
+        else:
+            with self.graph.as_default():
+                tf.import_graph_def(self._load_compiled(), name="")
+        self.logger.info(strings.tensorflow_loaded_model)
+        # Prefer feeding raw frames when the model allows it; the JPEG round trip is expensive.
+        try:
+            image_tensor = self.graph.get_tensor_by_name("image_tensor:0")
+            self.raw_input = image_tensor.op.type == "Placeholder" and image_tensor.dtype == tf.uint8
+        except KeyError:
+            self.raw_input = False
+        if self.raw_input:
+            self.logger.info(strings.tensorflow_raw_input)
+        else:
+            self.logger.warning(strings.tensorflow_encoded_input)
 
-    def enable(self):
+    def model_changed(self) -> bool:
+        """Whether saved_model.pb was replaced or modified since the model was loaded."""
+        return self.model_file is not None and self.model_file.changed()
+
+    def model_signature(self) -> Optional[Tuple[int, int, int, int]]:
+        """The identity of the model file as it is on disk now, or None before enabling or while it is missing."""
+        return self.model_file.current() if self.model_file is not None else None
+
+    def _load_compiled(self):
         """
-        Enable the session.
+        Load the compiled graph of the model from the cache, compiling and caching it first if it is not there.
         Returns:
-            Nothing.
+            The compiled GraphDef.
         """
-        global tf
-        self.session.__enter__()
-        self.logger.info(strings.tensorflow_loading_model)
-        tf.saved_model.loader.load(self.session, ["serve"], self.model_path)
-        self.logger.info(strings.tensorflow_loaded_model)
+        # The key changes whenever the model or the runtime does, so stale graphs are never loaded.
+        key = f"{model_hash(self.model_path)}-tf{tf.version.VERSION}"
+        graph_def = tf.GraphDef()
+        # Graphs are cached under what they were actually compiled into, so a TF-TRT request which fell back to a
+        # frozen graph finds that, but still prefers a TF-TRT graph cached where TensorRT was available.
+        for mode in ("trt", "frozen") if self.optimize == "trt" else (self.optimize,):
+            cache_path = os.path.join(self.cache, f"{key}-{mode}.pb")
+            if os.path.exists(cache_path):
+                with open(cache_path, "rb") as handle:
+                    graph_def.ParseFromString(handle.read())
+                self.logger.info(strings.tensorflow_cached_graph.format(mode=mode, path=cache_path))
+                return graph_def
+        start = perf_counter()
+        self.logger.info(strings.tensorflow_optimizing.format(mode=self.optimize))
+        graph_def, mode = self._compile()
+        cache_path = os.path.join(self.cache, f"{key}-{mode}.pb")
+        os.makedirs(self.cache, exist_ok=True)
+        # Write to a temporary file first, so that an interrupted start never leaves a truncated graph behind.
+        temporary = f"{cache_path}.{os.getpid()}.tmp"
+        with open(temporary, "wb") as handle:
+            handle.write(graph_def.SerializeToString())
+        os.replace(temporary, cache_path)
+        self.logger.info(strings.tensorflow_optimized.format(mode=mode, path=cache_path,
+                                                             seconds=round(perf_counter() - start, 2)))
+        return graph_def
+
+    def _compile(self) -> Tuple[object, str]:
+        """
+        Compile the saved model.
+        Returns:
+            The compiled GraphDef and what it was compiled into, which is "frozen" when TF-TRT was unavailable.
+        """
+        graph = tf.Graph()
+        with tf.Session(graph=graph) as session:
+            tf.saved_model.loader.load(session, ["serve"], self.model_path)
+            # Folding the variables into constants also drops every node the outputs do not depend on.
+            frozen = tf.graph_util.convert_variables_to_constants(session, graph.as_graph_def(), OUTPUTS)
+        if self.optimize == "trt":
+            try:
+                # noinspection PyUnresolvedReferences
+                from tensorflow.python.compiler.tensorrt import trt_convert  # type: ignore
+                # The outputs are passed by position, since the keyword was renamed between TensorFlow releases.
+                converter = trt_convert.TrtGraphConverter(None, None, None, frozen, OUTPUTS,
+                                                          precision_mode="FP16", is_dynamic_op=True)
+                return converter.convert(), "trt"
+            except Exception as e:  # noqa
+                self.logger.warning(strings.tensorflow_trt_unavailable.format(error=e))
+        return frozen, "frozen"
 
     def disable(self):
         """
@@ -83,20 +203,62 @@ class TensorFlowEngine(BaseEngine, ABC):
         Returns:
             Nothing.
         """
-        self.session.close()
+        if self.session is not None:
+            self.session.close()
+
+    def preprocess(self, image: np.ndarray) -> Union[np.ndarray, List[bytes]]:
+        """
+        Turn an image into a batch of one.
+        Args:
+            image: A BGR image.
+
+        Returns:
+            The input for invoke.
+        """
+        return self.preprocess_batch([image])
+
+    def invoke(self, tensor: Union[np.ndarray, List[bytes]]) -> Detections:
+        """
+        Infer on a batch of one image.
+        Args:
+            tensor: A preprocessed batch of one.
 
-    def infer(self, image: np.ndarray) -> List:
+        Returns:
+            The raw TensorFlow output.
         """
-        Infer on a byte-encoded image.
+        return self.invoke_batch(tensor)[0]
+
+    def preprocess_batch(self, images: List[np.ndarray]) -> Union[np.ndarray, List[bytes]]:
+        """
+        Turn several images into a single batch.
         Args:
-            image: A byte-encoded image to infer upon.
+            images: BGR images. Raw input batches are resized to the size of the first image.
 
         Returns:
-            A list containing the raw TensorFlow output.
-        """
-        return list(zip(*[i.tolist()[0] for i in self.session.run(
-            ["detection_scores:0", "detection_boxes:0"],
-            feed_dict={
-                "encoded_image_string_tensor:0": [cv2.imencode(".jpg", image)[1].tobytes()]
-            }
-        )]))
+            Either a batch of RGB images or a list of JPEG-encoded images, depending on what the model accepts.
+        """
+        if self.raw_input:
+            height, width = images[0].shape[:2]
+            batch = np.empty((len(images), height, width, 3), dtype=np.uint8)
+            for i, image in enumerate(images):
+                if image.shape[:2] != (height, width):
+                    image = cv2.resize(image, (width, height))
+                cv2.cvtColor(image, cv2.COLOR_BGR2RGB, dst=batch[i])
+            return batch
+        return [cv2.imencode(".jpg", image)[1].tobytes() for image in images]
+
+    def invoke_batch(self, tensors: Union[np.ndarray, List[bytes]]) -> List[Detections]:
+        """
+        Infer on a preprocessed batch in a single session run.
+        Args:
+            tensors: The preprocessed batch.
+
+        Returns:
+            The raw TensorFlow output for each image.
+        """
+        input_name = "image_tensor:0" if self.raw_input else "encoded_image_string_tensor:0"
+        scores, boxes, classes = self.session.run(
+            ["detection_scores:0", "detection_boxes:0", "detection_classes:0"],
+            feed_dict={input_name: tensors}
+        )
+        return [Detections(scores[i], boxes[i], classes[i]) for i in range(len(tensors))]
@@ -3,31 +3,57 @@
 The secondary inferrer for MLRun.
 """
 import logging
+import queue
 import sys
+import threading
 from abc import ABC
+from concurrent.futures import ThreadPoolExecutor
 import os
-from typing import Callable, Union
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 
 import cv2  # type: ignore
 import numpy as np  # type: ignore
 
 from mlrun import strings, loader
 from mlrun.config import configurations
-from mlrun.engines.base import BaseEngine
+from mlrun.engines.base import BaseEngine, ModelFile
 from mlrun.loader import ComponentType
+from mlrun.util import Detections
 
 Interpreter: Union[None, Callable] = None
 load_delegate: Union[None, Callable] = None
 
+# Shared library of the Edge TPU delegate.
+EDGETPU_SHARED_LIB = "libedgetpu.so.1.0"
 
+
+@loader.register(ComponentType.ENGINE)
 class TFLiteEngine(BaseEngine, ABC):
     """
     A TensorFlow Lite inferrer for MLRun.
     """
 
-    def __init__(self, path: str = ""):
-        global Interpreter
-        global load_delegate
+    def __init__(self, path: str = "", pool_size: int = 1, num_threads: int = 0, devices: str = "", mmap: bool = True,
+                 interpreter_factory: Optional[Callable[..., Any]] = None,
+                 delegate_factory: Optional[Callable[[str], Any]] = None):
+        """
+        Initialize the inference engine.
+        Args:
+            path: The path to the directory holding the model.
+            pool_size: The amount of interpreters to run frames on concurrently. Defaults to one.
+            num_threads: The amount of CPU threads each interpreter may use. Left to TFLite if zero.
+            devices: Comma-separated Edge TPU devices, such as "usb:0,usb:1", to create one interpreter for each.
+                "auto" enumerates the attached devices. The default device is used if empty.
+            mmap: Whether interpreters map the model file into memory. Mapped pages are shared with every other
+                process using the same file, but the file must then be replaced rather than rewritten in place. If
+                False, the file is read once into a private buffer which all interpreters of this process share.
+                Defaults to True.
+            interpreter_factory: Creates an interpreter from the keyword arguments of the TFLite Interpreter.
+                Defaults to the Interpreter of tflite_runtime.
+            delegate_factory: Creates the Edge TPU delegate for a device, which is empty for the default device. It
+                raises ValueError if the device cannot be used. Defaults to loading the Edge TPU library through
+                tflite_runtime.
+        """
         super().__init__(self)
         self.logger_name: str = configurations["desktop"]["logger"]["name"]
         self.logger = loader.load_component(
@@ -44,6 +70,22 @@ class TFLiteEngine(BaseEngine, ABC):
         self.input_details = None
         self.output_details = None
         self.image_size = None
+        self.pool_size = max(1, pool_size)
+        self.num_threads = num_threads
+        self.devices: List[str] = [device.strip() for device in devices.split(",") if device.strip()]
+        self.mmap = mmap
+        self.model_file: Optional[ModelFile] = None
+        self._content: Optional[bytes] = None
+        self.interpreters: List = []
+        self.device_names: Dict[Any, str] = {}
+        self._healthy = 0
+        self._health_lock = threading.Lock()
+        self._idle: queue.Queue = queue.Queue()
+        self._input_tensors: Dict[Any, Callable[[], np.ndarray]] = {}
+        self._output_tensors: Dict[Any, List[Callable[[], np.ndarray]]] = {}
+        self._direct_input = True
+        self._local = threading.local()
+        self._executor: Optional[ThreadPoolExecutor] = None
         if os.path.exists(self.model + "/model_edgetpu.tflite"):
             self.logger.info(strings.tflite_coral_model_present)
             self.tpu = True
@@ -54,7 +96,78 @@ class TFLiteEngine(BaseEngine, ABC):
         else:
             self.logger.error(strings.tflite_model_missing)
             sys.exit(1)
-        # Attempt to load TFLite and the appropriate delegate.
+        # The runtime is only imported by enable, so that importing it overlaps with the other start-up phases.
+        self.interpreter_factory: Optional[Callable[..., Any]] = interpreter_factory
+        self.delegate_factory: Callable[[str], Any] = delegate_factory or self._load_delegate
+        self._import_delegate = delegate_factory is None
+
+    @staticmethod
+    def _load_delegate(device: str) -> Any:
+        return load_delegate(EDGETPU_SHARED_LIB, {"device": device} if device else {})  # type: ignore
+
+    def _create_interpreter(self, device: str = ""):
+        """
+        Create and allocate a single interpreter.
+        Args:
+            device: The Edge TPU device to delegate to. The default device is used if empty.
+
+        Raises:
+            ValueError: If the Edge TPU delegate could not be loaded.
+        """
+        # TFLite memory-maps files it is given by path; buffers have to be bytes, which it only references.
+        kwargs: Dict[str, Any] = {"model_path": self.full_path} if self.mmap else {"model_content": self._content}
+        if self.num_threads > 0:
+            kwargs["num_threads"] = self.num_threads
+        if self.tpu:
+            kwargs["experimental_delegates"] = [self.delegate_factory(device)]
+        try:
+            interpreter = self.interpreter_factory(**kwargs)
+        except TypeError:
+            # Older TFLite runtimes do not accept a thread count. Any other rejected argument is a real error.
+            if kwargs.pop("num_threads", None) is None:
+                raise
+            self.logger.warning(strings.tflite_num_threads_unsupported)
+            interpreter = self.interpreter_factory(**kwargs)
+        interpreter.allocate_tensors()
+        return interpreter
+
+    def _enumerate_devices(self) -> List[str]:
+        """
+        List the attached Edge TPU devices, or just the default device if they cannot be listed.
+        """
+        try:
+            from pycoral.utils.edgetpu import list_edge_tpus  # type: ignore
+        except ImportError:
+            self.logger.warning(strings.tflite_enumeration_unsupported)
+            return [""]
+        counts: Dict[str, int] = {}
+        devices = []
+        for tpu in list_edge_tpus():
+            devices.append(f"{tpu['type']}:{counts.get(tpu['type'], 0)}")
+            counts[tpu["type"]] = counts.get(tpu["type"], 0) + 1
+        return devices or [""]
+
+    def model_changed(self) -> bool:
+        """
+        Check whether the model file changed since the interpreters were created.
+
+        Returns:
+            True if the file was replaced or modified. Disabling and enabling the engine again loads the new model.
+        """
+        return self.model_file is not None and self.model_file.changed()
+
+    def model_signature(self) -> Optional[Tuple[int, int, int, int]]:
+        """The identity of the model file as it is on disk now, or None before enabling or while it is missing."""
+        return self.model_file.current() if self.model_file is not None else None
+
+    def _import_runtime(self):
+        """
+        Load TFLite and the appropriate delegate, unless both were provided.
+        """
+        global Interpreter
+        global load_delegate
+        if self.interpreter_factory is not None and not (self.tpu and self._import_delegate):
+            return
         try:
             if self.tpu:
                 from tflite_runtime.interpreter import Interpreter, load_delegate  # type: ignore
@@ -63,46 +176,177 @@ class TFLiteEngine(BaseEngine, ABC):
         except ImportError:
             self.logger.error(strings.tflite_not_found)
             sys.exit(1)
+        if self.interpreter_factory is None:
+            self.interpreter_factory = Interpreter
 
     def enable(self):
         """
-        Enable the interpreter.
+        Import the runtime if needed and enable the interpreters.
         """
-        # Now make a delegate if it worked.
+        self._import_runtime()
+        if self.model_file is None or self.model_file.changed():
+            # Note the file before reading it, so that a change during the read is still noticed.
+            self.model_file = ModelFile(self.full_path)
+            if not self.mmap:
+                with open(self.full_path, "rb") as handle:
+                    self._content = handle.read()
+        self.logger.info(strings.tflite_model_mapped if self.mmap else strings.tflite_model_buffered)
         if self.tpu:
+            if self.devices == ["auto"]:
+                self.devices = self._enumerate_devices()
+            # One interpreter per Edge TPU device.
+            targets = self.devices or [""]
+        else:
+            targets = [f"cpu:{i}" for i in range(self.pool_size)]
+        for target in targets:
             try:
-                self.interpreter = Interpreter(model_path=self.full_path,
-                                               experimental_delegates=[load_delegate("libedgetpu.so.1.0")])
+                interpreter = self._create_interpreter(target if self.tpu else "")
             except ValueError:
-                self.logger.error("Failed to load Edge TPU delegate. Is your Coral Accelerator attached?")
-                sys.exit(1)
-        else:
-            self.interpreter = Interpreter(model_path=self.full_path)
-        self.interpreter.allocate_tensors()
+                self.logger.error(strings.tflite_delegate_failed.format(device=target or "default"))
+                continue
+            self.interpreters.append(interpreter)
+            self.device_names[interpreter] = target or "default"
+            self._input_tensors[interpreter] = interpreter.tensor(interpreter.get_input_details()[0]["index"])
+            self._output_tensors[interpreter] = [interpreter.tensor(output["index"])
+                                                 for output in interpreter.get_output_details()]
+            self._idle.put(interpreter)
+        if not self.interpreters:
+            self.logger.error("Failed to load Edge TPU delegate. Is your Coral Accelerator attached?")
+            sys.exit(1)
+        self._healthy = len(self.interpreters)
+        self.interpreter = self.interpreters[0]
         self.input_details = self.interpreter.get_input_details()
         self.output_details = self.interpreter.get_output_details()
         self.image_size = self.input_details[0]["shape"].tolist()[1:3]
+        # OpenCV only writes into an output array of the type it produces; for any other input type it would
+        # silently allocate a new array and leave the input tensor untouched.
+        self._direct_input = self.input_details[0]["dtype"] == np.uint8
+        if len(self.interpreters) > 1:
+            self.logger.info(strings.tflite_pool_created.format(
+                count=len(self.interpreters), devices=", ".join(self.device_names.values())
+            ))
+            self._executor = ThreadPoolExecutor(max_workers=len(self.interpreters), thread_name_prefix="mlrun-tflite")
 
     def disable(self):
         """
-        Does nothing for TFLite.
+        Stop the interpreter pool, if there is one, and release the interpreters.
         """
-        pass
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        self.interpreters = []
+        self.interpreter = None
+        self.device_names = {}
+        self._input_tensors = {}
+        self._output_tensors = {}
+        self._idle = queue.Queue()
+
+    def _scratch(self, count: int) -> List[np.ndarray]:
+        """
+        Get preallocated buffers for resized frames, one per image in a batch.
+
+        Every thread has its own buffers, which are only reallocated when a bigger batch than before arrives.
+        """
+        scratch = getattr(self._local, "scratch", None)
+        if scratch is None or len(scratch) < count:
+            height, width = self.image_size  # type: ignore
+            scratch = self._local.scratch = list(np.empty((count, height, width, 3), dtype=np.uint8))
+        return scratch
+
+    def preprocess(self, image: np.ndarray) -> np.ndarray:
+        """
+        Resize an image to the input size of the model.
+
+        The result is written into a preallocated buffer, which the next call from the same thread reuses.
+        """
+        return cv2.resize(image, (self.image_size[1], self.image_size[0]), dst=self._scratch(1)[0])  # type: ignore
+
+    def preprocess_batch(self, images: List[np.ndarray]) -> List[np.ndarray]:
+        """
+        Resize several images to the input size of the model.
+
+        The results are written into preallocated buffers, which the next call from the same thread reuses.
+        """
+        scratch = self._scratch(len(images))
+        return [
+            cv2.resize(image, (self.image_size[1], self.image_size[0]), dst=scratch[i])  # type: ignore
+            for i, image in enumerate(images)
+        ]
+
+    def _checkout(self):
+        """
+        Wait for an idle interpreter.
+
+        Raises:
+            RuntimeError: If every interpreter has failed.
+        """
+        while True:
+            if self._healthy == 0:
+                raise RuntimeError(strings.tflite_no_devices_left)
+            try:
+                return self._idle.get(timeout=0.5)
+            except queue.Empty:
+                continue
+
+    def _retire(self, interpreter, error: Exception):
+        """
+        Stop using an interpreter whose Edge TPU failed.
+        """
+        with self._health_lock:
+            self._healthy -= 1
+        self.logger.error(strings.tflite_device_failed.format(
+            device=self.device_names[interpreter], error=error, left=self._healthy
+        ))
+
+    def _read_outputs(self, interpreter) -> Detections:
+        """
+        Copy the valid detections out of the output tensors of an interpreter.
+
+        The outputs are read through views, and only the rows counted by the detection count output (when the
+        model has one) are copied. The views are released on return, before the interpreter is invoked again.
+        """
+        outputs = self._output_tensors[interpreter]
+        boxes, classes, scores = outputs[0]()[0], outputs[1]()[0], outputs[2]()[0]
+        count = int(outputs[3]()[0]) if len(outputs) > 3 else len(scores)
+        return Detections(scores[:count].copy(), boxes[:count].copy(), classes[:count].copy())
+
+    def invoke(self, tensor: np.ndarray) -> Detections:
+        """
+        Run inference on whichever interpreter is idle. Safe to call from several threads at once.
+
+        If an Edge TPU fails, its interpreter is dropped and the input is retried on another one.
+        """
+        while True:
+            interpreter = self._checkout()
+            try:
+                if self._direct_input:
+                    # Swap BGR to RGB while copying straight into the input tensor owned by the interpreter. The
+                    # view has to be released before invoking.
+                    input_tensor = self._input_tensors[interpreter]()
+                    cv2.cvtColor(tensor, cv2.COLOR_BGR2RGB, dst=input_tensor[0])
+                    del input_tensor
+                else:
+                    # set_tensor checks the type, and raises for inputs which do not match it.
+                    interpreter.set_tensor(self.input_details[0]["index"],  # type: ignore
+                                           cv2.cvtColor(tensor, cv2.COLOR_BGR2RGB)[np.newaxis])
+                try:
+                    interpreter.invoke()  # type: ignore
+                except (RuntimeError, ValueError) as e:
+                    if not self.tpu:
+                        raise
+                    # Only a failure of the device itself retires its interpreter; the input is retried elsewhere.
+                    self._retire(interpreter, e)
+                    interpreter = None
+                    continue
+                return self._read_outputs(interpreter)
+            finally:
+                if interpreter is not None:
+                    self._idle.put(interpreter)
 
-    def infer(self, image: np.ndarray) -> list:
+    def invoke_batch(self, tensors: List[np.ndarray]) -> List[Detections]:
         """
-        Run inference.
+        Run inference on several inputs, spread across the interpreter pool. Results are returned in input order.
         """
-        image = np.expand_dims(
-            cv2.resize(
-                image,
-                (self.image_size[0], self.image_size[1])  # type: ignore
-            )[:, :, ::-1],  # type: ignore
-            axis=0
-        )  # type: ignore
-        self.interpreter.set_tensor(self.input_details[0]["index"], image)  # type: ignore
-        self.interpreter.invoke()  # type: ignore
-        return list(zip(*[
-            self.interpreter.get_tensor(self.output_details[2]["index"])[0],  # type: ignore
-            self.interpreter.get_tensor(self.output_details[0]["index"])[0]  # type: ignore
-        ]))
+        if self._executor is None:
+            return [self.invoke(tensor) for tensor in tensors]
+        return list(self._executor.map(self.invoke, tensors))
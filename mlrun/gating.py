@@ -0,0 +1,57 @@
+"""Motion-gated inference for MLRun.
+
+Before a frame is inferred upon, a small greyscale thumbnail of it is compared with the thumbnail of the last frame
+which was inferred upon. If the scene has barely changed, the detections of that frame are reused and the engine
+is not run at all.
+"""
+from typing import Optional, Tuple
+
+import cv2  # type: ignore
+import numpy as np  # type: ignore
+
+
+class MotionGate:
+    """
+    Decides whether a camera's frame differs enough from the last inferred one to be worth inferring upon.
+    """
+
+    def __init__(self, threshold: float = 4.0, size: Tuple[int, int] = (32, 24), max_skip: int = 30):
+        """
+        Initialize the gate.
+        Args:
+            threshold: The mean absolute difference, in grey levels from 0 to 255, between thumbnails above which a
+                frame counts as changed. Defaults to four.
+            size: The width and height of the thumbnails. Defaults to 32x24.
+            max_skip: Infer upon a frame anyway after this many frames in a row were skipped, so that results never
+                go stale for long. Defaults to 30.
+        """
+        self.threshold = threshold
+        self.size = size
+        self.max_skip = max_skip
+        self.skipped = 0
+        self._reference: Optional[np.ndarray] = None
+        self._small = np.empty((size[1], size[0], 3), dtype=np.uint8)
+        self._thumbnail = np.empty((size[1], size[0]), dtype=np.uint8)
+
+    def _shrink(self, frame: np.ndarray) -> np.ndarray:
+        # Shrink before dropping colour, so that the conversion only touches a few hundred pixels.
+        cv2.resize(frame, self.size, dst=self._small, interpolation=cv2.INTER_AREA)
+        return cv2.cvtColor(self._small, cv2.COLOR_BGR2GRAY, dst=self._thumbnail)
+
+    def changed(self, frame: np.ndarray) -> bool:
+        """
+        Check a frame against the last inferred one. Frames which count as changed become the new reference.
+        Args:
+            frame: The BGR frame from the camera.
+
+        Returns:
+            Whether the frame should be inferred upon.
+        """
+        thumbnail = self._shrink(frame)
+        if (self._reference is not None and self.skipped < self.max_skip
+                and cv2.norm(thumbnail, self._reference, cv2.NORM_L1) <= self.threshold * thumbnail.size):
+            self.skipped += 1
+            return False
+        self._reference = thumbnail.copy()
+        self.skipped = 0
+        return True
@@ -2,11 +2,8 @@
 
 These functions are essential to the operation of MLRun.
 """
-from typing import Callable, Dict
-import importlib.util
-from pathlib import Path
-import os
-import pyclbr
+from typing import Callable, Dict, Optional, TypeVar
+import importlib
 from enum import Enum
 
 from mlrun import strings
@@ -20,41 +17,61 @@ class ComponentType(Enum):
     PUBLISHER = 3
 
 
-def get_package(package_name: str, must_implement: str) -> Dict[str, str]:
+T = TypeVar("T")
+
+
+# The singular name and package of each component type.
+_PACKAGES = {
+    ComponentType.CAMERA: ("camera", "mlrun.cameras"),
+    ComponentType.ENGINE: ("engine", "mlrun.engines"),
+    ComponentType.LOGGER: ("logger", "mlrun.loggers"),
+    ComponentType.PUBLISHER: ("publisher", "mlrun.publishers"),
+}
+
+# Registered components of each type by name, filled in as their modules are imported.
+_registry: Dict[ComponentType, Dict[str, Callable]] = {ctype: {} for ctype in ComponentType}
+
+
+def register(ctype: ComponentType, name: Optional[str] = None) -> Callable[[T], T]:
+    """
+    Register a class as a loadable component.
+
+    Usage:
+        @loader.register(ComponentType.ENGINE)
+        class TFLiteEngine(BaseEngine):
+            ...
+    Args:
+        ctype: Type of component.
+        name: The name the component is loaded by. Defaults to the name of its module, which is the name used in
+            configuration files.
+
+    Returns:
+        A decorator which registers the class and returns it unchanged.
+    """
+    def decorator(cls: T) -> T:
+        _registry[ctype][name or cls.__module__.rpartition(".")[2]] = cls
+        return cls
+    return decorator
+
+
+def get_package(ctype: ComponentType) -> Dict[str, Callable]:
     """
-    Get the files within a directory which happen in have a class that implements a given class.
-    (Whew, that is a mouthful...)
+    Get the components of a type which have been registered so far.
     Args:
-        package_name: String name of the subpackage to enumerate over.
-        must_implement: The name of the class that the returned classes must implement.
+        ctype: Type of component.
+
     Returns:
-        A dictionary of the classes that happen to occur in the specified name.
+        A dictionary from each component name to its class. Components whose modules were not imported yet are
+        missing.
     """
-    spec = importlib.util.find_spec(package_name)
-    if spec is None:
-        return {}
-    else:
-        assert isinstance(spec.origin, str)
-        pathname = Path(spec.origin).parent
-        ret = {}
-        with os.scandir(pathname) as entries:
-            for entry in entries:
-                if entry.name.startswith("__"):
-                    continue
-                current = ".".join((package_name, entry.name.partition(".")[0]))
-                if entry.is_file():
-                    if entry.name.endswith(".py"):
-                        if "base" not in entry.name:
-                            module_info = pyclbr.readmodule(current)
-                            for value in module_info.values():
-                                if value.super[0] == must_implement:  # type: ignore
-                                    ret[current.split(".")[2]] = value.name
-        return ret
+    return dict(_registry[ctype])
 
 
 def load_component(ctype: ComponentType, name: str) -> Callable:
     """
     Load a component from it's file.
+
+    Only the module of the requested component is imported, and only the first time it is requested.
     Args:
         ctype: Type of component.
         name: File name of component under a given category.
@@ -62,37 +79,21 @@ def load_component(ctype: ComponentType, name: str) -> Callable:
     Returns:
         The Callable init method of the class.
     """
+    components = _registry[ctype]
+    if name in components:
+        return components[name]
 
-    # Determine the needed parameters.
-    if ctype == ComponentType.CAMERA:
-        singular = "camera"
-        package = "mlrun.cameras"
-        base = "BaseCamera"
-    elif ctype == ComponentType.ENGINE:
-        singular = "engine"
-        package = "mlrun.engines"
-        base = "BaseEngine"
-    elif ctype == ComponentType.LOGGER:
-        singular = "logger"
-        package = "mlrun.loggers"
-        base = "BaseLogger"
-    elif ctype == ComponentType.PUBLISHER:
-        singular = "publisher"
-        package = "mlrun.publishers"
-        base = "BasePublisher"
-
+    singular, package = _PACKAGES[ctype]
     # Prevent importing the base class.
     if name == "base":
         raise ImportError(strings.error_base_import.format(component=singular))
 
-    # Search for the correct package.
-    components = get_package(package, base)
-
-    # Enumerate over returned packages.
-    for key, value in components.items():
-        # If the name of the component we are searching for is matched,
-        # import it and return its main module.
-        if key == name:
-            module = __import__(f"{package}.{key}", fromlist=[value])
-            return getattr(module, value)
-    raise ImportError(strings.error_component_not_found.format(component=singular, name=name))
+    # Importing the module registers its component.
+    try:
+        importlib.import_module(f"{package}.{name}")
+    except ModuleNotFoundError as e:
+        if e.name != f"{package}.{name}":
+            raise
+    if name not in components:
+        raise ImportError(strings.error_component_not_found.format(component=singular, name=name))
+    return components[name]
@@ -2,10 +2,13 @@
 This file defines the colored logger class for MLRun.
 """
 from .base import BaseLogger
+from mlrun import loader
+from mlrun.loader import ComponentType
 from mlrun import strings
 import logging
 
 
+@loader.register(ComponentType.LOGGER)
 class ColoredLogger(BaseLogger):
     """
     The colored logger class for MLRun.
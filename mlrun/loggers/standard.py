@@ -3,9 +3,12 @@ This file defines the most simple logger class for MLRun.
 This is used by default.
 """
 from .base import BaseLogger
+from mlrun import loader
+from mlrun.loader import ComponentType
 import logging
 
 
+@loader.register(ComponentType.LOGGER)
 class StandardLogger(BaseLogger):
     """
     The standard logger class for MLRun.
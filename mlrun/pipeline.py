@@ -0,0 +1,172 @@
+"""Staged capture, inference and publishing for MLRun.
+
+Splits the main loop into a capture thread, inference threads and a publishing stage, joined by bounded queues
+which drop their oldest item instead of blocking. This keeps the accelerator busy and working on the freshest frame.
+"""
+import queue
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, Optional
+
+
+class DropOldestQueue:
+    """
+    A bounded, thread-safe queue which discards its oldest item when a new one arrives and it is full.
+    """
+
+    def __init__(self, maxsize: int = 1):
+        """
+        Initialize the queue.
+        Args:
+            maxsize: The maximum amount of items held at once. Defaults to one.
+        """
+        self._items: deque = deque(maxlen=max(1, maxsize))
+        self._condition = threading.Condition()
+        self.dropped = 0
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def put(self, item: Any) -> bool:
+        """
+        Add an item, discarding the oldest one if the queue is full.
+        Args:
+            item: The item to add.
+
+        Returns:
+            Whether an older item was discarded.
+        """
+        with self._condition:
+            full = len(self._items) == self._items.maxlen
+            if full:
+                self.dropped += 1
+            self._items.append(item)
+            self._condition.notify()
+        return full
+
+    def get(self, timeout: Optional[float] = None) -> Any:
+        """
+        Remove and return the oldest item, waiting for one if the queue is empty.
+        Args:
+            timeout: Seconds to wait for an item. Waits forever if None.
+
+        Returns:
+            The oldest item in the queue.
+
+        Raises:
+            queue.Empty: If no item arrived within the timeout.
+        """
+        with self._condition:
+            if not self._condition.wait_for(lambda: len(self._items) > 0, timeout):
+                raise queue.Empty()
+            return self._items.popleft()
+
+
+class Pipeline:
+    """
+    Runs capture and inference on their own threads and publishes on the calling thread.
+
+    Publishing stays on the calling thread so that OpenCV windows and KeyboardInterrupt keep working. With several
+    inference workers, results are still published in the order their frames were taken from the capture queue.
+    """
+
+    def __init__(self, capture: Callable[[], Any], infer: Callable[[Any], Any], publish: Callable[[Any], None],
+                 queue_size: int = 1, paused: Optional[Callable[[], bool]] = None, workers: int = 1):
+        """
+        Initialize the pipeline.
+        Args:
+            capture: Returns the next captured item.
+            infer: Turns a captured item into a result.
+            publish: Consumes a result.
+            queue_size: The size of the queues between stages. Defaults to one.
+            paused: Returns whether capture should be held back. Optional.
+            workers: The amount of inference threads. Only useful if infer is thread-safe. Defaults to one.
+        """
+        self.capture = capture
+        self.infer = infer
+        self.publish = publish
+        self.paused = paused
+        self.workers = max(1, workers)
+        self.captured = DropOldestQueue(queue_size)
+        self.inferred = DropOldestQueue(max(queue_size, self.workers))
+        self._running = threading.Event()
+        self._error: Optional[BaseException] = None
+        self._take_lock = threading.Lock()
+        self._taken = 0
+        self._pending: Dict[int, Any] = {}
+        self._next = 0
+        self._threads = [
+            threading.Thread(target=self._stage, args=(self._capture_once,), name="mlrun-capture", daemon=True)
+        ] + [
+            threading.Thread(target=self._stage, args=(self._infer_once,), name=f"mlrun-infer-{i}", daemon=True)
+            for i in range(self.workers)
+        ]
+
+    def _capture_once(self):
+        if self.paused is not None and self.paused():
+            time.sleep(0.01)
+            return
+        self.captured.put(self.capture())
+
+    def _infer_once(self):
+        # Number frames as they are taken, so that the order can be restored after inference.
+        with self._take_lock:
+            try:
+                item = self.captured.get(timeout=0.1)
+            except queue.Empty:
+                return
+            sequence = self._taken
+            self._taken += 1
+        self.inferred.put((sequence, self.infer(item)))
+
+    def _publish_ready(self, sequence: int, result: Any):
+        self._pending[sequence] = result
+        # A result may never arrive if it was dropped from the queue; skip ahead once enough later ones are waiting.
+        if self._next not in self._pending and len(self._pending) > self.workers:
+            self._next = min(self._pending)
+        while self._next in self._pending:
+            self.publish(self._pending.pop(self._next))
+            self._next += 1
+        for stale in [key for key in self._pending if key < self._next]:
+            del self._pending[stale]
+
+    def _stage(self, step: Callable[[], None]):
+        try:
+            while self._running.is_set():
+                step()
+        except BaseException as e:  # noqa
+            # Hand the error (usually EOFError) over to the publishing thread.
+            if self._error is None:
+                self._error = e
+            self._running.clear()
+
+    def run(self):
+        """
+        Start the stages and publish results until stopped.
+
+        Errors raised by any stage are re-raised here.
+        """
+        self._running.set()
+        for thread in self._threads:
+            thread.start()
+        try:
+            while self._running.is_set():
+                try:
+                    sequence, result = self.inferred.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                self._publish_ready(sequence, result)
+        finally:
+            self.stop()
+        if self._error is not None:
+            raise self._error
+
+    def stop(self):
+        """
+        Stop all stages and wait for them to finish.
+        """
+        self._running.clear()
+        for thread in self._threads:
+            if thread.is_alive() and thread is not threading.current_thread():
+                thread.join()
@@ -0,0 +1,165 @@
+"""Hot-path instrumentation for MLRun.
+
+Times each pipeline stage with a monotonic nanosecond clock, keeps a latency histogram per stage and can write the
+timings out as a Chrome trace (open it in chrome://tracing or Perfetto). When profiling is disabled, stages are only
+timed for the rolling pipeline statistics, if there are any.
+"""
+import json
+import os
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Optional
+
+from mlrun import strings
+from mlrun.stats import LatencyHistogram, PipelineStats
+
+# time.perf_counter_ns only exists from Python 3.7 onwards.
+clock: Callable[[], int] = getattr(time, "perf_counter_ns", None) or (lambda: int(time.perf_counter() * 1e9))
+
+
+class _NullStage:
+    """A stage which does nothing, shared by every call while nothing is being measured."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+
+class _Stage:
+    """Times a single run of a stage."""
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler: "Profiler", name: str):
+        self.profiler = profiler
+        self.name = name
+        self.start = 0
+
+    def __enter__(self):
+        self.start = clock()
+        return self
+
+    def __exit__(self, *args):
+        self.profiler.record(self.name, self.start, clock())
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class Profiler:
+    """
+    Per-stage timing for the pipeline.
+
+    Usage:
+        with profiler.stage("infer"):
+            engine.invoke(tensor)
+    """
+
+    def __init__(self, enabled: bool = False, stats: Optional[PipelineStats] = None, trace_path: str = "",
+                 interval: float = 10.0, logger: Optional[Callable[[str], None]] = None, window: int = 1000,
+                 max_events: int = 100000):
+        """
+        Initialize the profiler.
+        Args:
+            enabled: Whether to keep histograms and trace events. Defaults to False.
+            stats: Rolling statistics to feed stage timings into, whether or not profiling is enabled. Optional.
+            trace_path: Where to write a Chrome trace on each report. Nothing is written if empty.
+            interval: Seconds between reports. Defaults to ten.
+            logger: Where to write reports to. Optional.
+            window: The amount of samples each histogram keeps. Defaults to 1000.
+            max_events: The amount of trace events kept in memory. Defaults to 100000.
+        """
+        self.enabled = enabled
+        self.stats = stats
+        self.trace_path = trace_path
+        self.interval = interval
+        self.logger = logger
+        self.window = window
+        self.histograms: Dict[str, LatencyHistogram] = {}
+        self.maxima: Dict[str, int] = {}
+        self._events: deque = deque(maxlen=max_events)
+        self._last_report = clock()
+
+    def stage(self, name: str):
+        """
+        Time a stage.
+        Args:
+            name: The name of the stage.
+
+        Returns:
+            A context manager to run the stage in.
+        """
+        if not self.enabled and self.stats is None:
+            return _NULL_STAGE
+        return _Stage(self, name)
+
+    def record(self, name: str, start: int, end: int):
+        """
+        Record a run of a stage.
+        Args:
+            name: The name of the stage.
+            start: The clock value in nanoseconds when it started.
+            end: The clock value in nanoseconds when it ended.
+        """
+        duration = end - start
+        if self.stats is not None and name in self.stats.stages:
+            self.stats.record(name, duration / 1e9)
+        if not self.enabled:
+            return
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms.setdefault(name, LatencyHistogram(self.window, minimum=1e-6))
+        histogram.add(duration / 1e9)
+        if duration > self.maxima.get(name, 0):
+            self.maxima[name] = duration
+        if self.trace_path:
+            self._events.append((name, start, duration, threading.get_ident()))
+
+    def report(self) -> dict:
+        """
+        Summarize the stage timings.
+        Returns:
+            A dictionary from each stage name to its total count and its windowed percentiles and all-time maximum
+            in milliseconds.
+        """
+        return {
+            name: dict(
+                count=histogram.total,
+                max=round(self.maxima.get(name, 0) / 1e6, 3),
+                **{f"p{p}": round(1000 * histogram.percentile(p), 3) for p in PipelineStats.PERCENTILES}
+            )
+            for name, histogram in list(self.histograms.items())
+        }
+
+    def dump_trace(self, path: str):
+        """
+        Write the kept trace events to a Chrome trace file.
+        Args:
+            path: The path to write to. It is replaced atomically.
+        """
+        pid = os.getpid()
+        events = [
+            {"name": name, "ph": "X", "ts": start / 1000, "dur": duration / 1000, "pid": pid, "tid": tid}
+            for name, start, duration, tid in list(self._events)
+        ]
+        with open(path + ".tmp", "w") as handle:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, handle)
+        os.replace(path + ".tmp", path)
+
+    def tick(self):
+        """
+        Report and write the trace out if the report interval has passed. Call this once per frame.
+        """
+        if not self.enabled:
+            return
+        now = clock()
+        if now - self._last_report < self.interval * 1e9:
+            return
+        self._last_report = now
+        if self.logger is not None:
+            self.logger(strings.profiler_report.format(report=json.dumps(self.report())))
+        if self.trace_path:
+            self.dump_trace(self.trace_path)
@@ -0,0 +1,124 @@
+"""Asynchronous publisher wrapper for MLRun.
+
+Wraps any other publisher and hands its writes to a separate thread, so a stalled network connection never holds up
+capture or inference. The values written between two flushes form a batch. Batches flushed while the thread is still
+busy are merged into the one waiting for it, so only older values of the same keys are ever dropped."""
+import threading
+from abc import ABC
+from typing import Any, Dict, Optional
+
+from mlrun.publishers.base import BasePublisher
+
+
+class AsyncPublisher(BasePublisher, ABC):
+    """
+    Background sender around another publisher, which merges batches it cannot keep up with.
+    """
+
+    def __init__(self, publisher: BasePublisher):
+        """
+        Initialize the wrapper.
+        Args:
+            publisher: The publisher to send batches with.
+        """
+        super().__init__()
+        self.publisher = publisher
+        self.sent = 0
+        self.dropped = 0
+        self._batch: Dict[str, Any] = {}
+        self._waiting: Dict[str, Any] = {}
+        self._flushing = False
+        self._condition = threading.Condition()
+        self._error: Optional[BaseException] = None
+        self._running = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def enable(self) -> Any:
+        """
+        Enable the wrapped publisher and start the sending thread.
+        Returns:
+            Whatever the wrapped publisher returned.
+        """
+        enabled = self.publisher.enable()
+        self._running.set()
+        self._thread = threading.Thread(target=self._send, name="mlrun-publisher", daemon=True)
+        self._thread.start()
+        return enabled
+
+    def disable(self):
+        """
+        Stop the sending thread, send what is left on this thread and disable the wrapped publisher.
+        Returns:
+            Nothing.
+        """
+        self._running.clear()
+        with self._condition:
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+        self._waiting.update(self._batch)
+        self._batch = {}
+        if self._waiting:
+            self._deliver(self._waiting)
+            self._waiting = {}
+        self.publisher.disable()
+
+    def put(self, key: str, value: Any):
+        """
+        Add a value to the current batch. Only the last value for each key is kept.
+        Args:
+            key: The key to publish the value under.
+            value: The value to publish.
+        """
+        self._batch[key] = value
+
+    def flush(self):
+        """
+        Hand the current batch to the sending thread. If the batch before it was not sent yet, the two are merged, and
+        the newest value of each key wins. The wrapped publisher is flushed even if the batch is empty, so that values
+        it held back, such as ones deferred by a rate limit, are still written once they are due.
+
+        Errors raised by the wrapped publisher since the last flush are re-raised here.
+        """
+        if self._error is not None:
+            raise self._error
+        with self._condition:
+            # Count batches which were not sent on their own, the way DropOldestQueue counts dropped items.
+            if self._waiting and self._batch:
+                self.dropped += 1
+            self._waiting.update(self._batch)
+            self._flushing = True
+            self._condition.notify()
+        self._batch = {}
+
+    def is_connected(self) -> Optional[bool]:
+        """Whether the wrapped publisher is connected."""
+        return self.publisher.is_connected()
+
+    def is_enabled(self) -> Optional[bool]:
+        """The enabled flag of the wrapped publisher."""
+        return self.publisher.is_enabled()
+
+    def requested_model(self) -> str:
+        """The model requested through the wrapped publisher."""
+        return self.publisher.requested_model()
+
+    def _deliver(self, batch: Dict[str, Any]):
+        for key, value in batch.items():
+            self.publisher.put(key, value)
+        self.publisher.flush()
+        if batch:
+            self.sent += 1
+
+    def _send(self):
+        try:
+            while self._running.is_set():
+                with self._condition:
+                    self._condition.wait_for(lambda: self._flushing or not self._running.is_set(), 0.1)
+                    if not self._flushing:
+                        continue
+                    batch, self._waiting, self._flushing = self._waiting, {}, False
+                self._deliver(batch)
+        except BaseException as e:  # noqa
+            # Hand the error over to the publishing thread.
+            self._error = e
@@ -1,8 +1,6 @@
 """Base publisher class for MLRun."""
 from abc import ABC, abstractmethod
-from typing import Callable, Union
-
-from _pynetworktables import NetworkTable
+from typing import Any, Optional
 
 
 class BasePublisher(ABC):
@@ -13,11 +11,43 @@ class BasePublisher(ABC):
         pass
 
     @abstractmethod
-    def enable(self) -> Union[Callable, NetworkTable]:
-        """Enable your publisher here."""
+    def enable(self) -> Any:
+        """Enable your publisher here. Return whatever handle it publishes through."""
         pass
 
     @abstractmethod
     def disable(self):
         """Disable your publisher here."""
         pass
+
+    @abstractmethod
+    def put(self, key: str, value: Any):
+        """
+        Publish a single value here.
+        Args:
+            key: The key to publish the value under.
+            value: The value to publish.
+        """
+        pass
+
+    def flush(self):
+        """Send any buffered values. Override this if your publisher buffers values."""
+        pass
+
+    def is_connected(self) -> Optional[bool]:
+        """
+        Whether a robot is connected. Override this if your publisher follows a connection to the robot.
+
+        Returns:
+            None by default, for publishers which cannot tell. Their values are always sent, but they take no part
+            in the enabled handshake.
+        """
+        return None
+
+    def is_enabled(self) -> Optional[bool]:
+        """The last value of the enabled flag, or None by default. Override this if your publisher can receive it."""
+        return None
+
+    def requested_model(self) -> str:
+        """The last model requested, or an empty string. Override this if your publisher can receive requests."""
+        return ""
@@ -0,0 +1,76 @@
+"""Fan-out publisher for MLRun."""
+from abc import ABC
+from typing import Any, Iterable, List, Optional
+
+from mlrun.publishers.base import BasePublisher
+
+
+def _combine(answers: Iterable[Optional[bool]]) -> Optional[bool]:
+    # Publishers without an opinion, such as UDP, must not outvote the ones which follow the robot.
+    known = [answer for answer in answers if answer is not None]
+    return any(known) if known else None
+
+
+class FanOutPublisher(BasePublisher, ABC):
+    """
+    Sends every value to several publishers.
+
+    Values are serialized once by the caller, and the same object is handed to every publisher.
+    """
+
+    def __init__(self, publishers: List[BasePublisher]):
+        """
+        Initialize the fan-out.
+        Args:
+            publishers: The publishers to send values to.
+        """
+        super().__init__()
+        self.publishers = publishers
+
+    def enable(self) -> Any:
+        """
+        Enable every publisher.
+        Returns:
+            What each publisher returned, in order.
+        """
+        return [publisher.enable() for publisher in self.publishers]
+
+    def disable(self):
+        """
+        Disable every publisher.
+        Returns:
+            Nothing.
+        """
+        for publisher in self.publishers:
+            publisher.disable()
+
+    def put(self, key: str, value: Any):
+        """
+        Send a value to every publisher.
+        Args:
+            key: The key to publish the value under.
+            value: The value to publish.
+        """
+        for publisher in self.publishers:
+            publisher.put(key, value)
+
+    def flush(self):
+        """Flush every publisher."""
+        for publisher in self.publishers:
+            publisher.flush()
+
+    def is_connected(self) -> Optional[bool]:
+        """Whether any publisher which follows a robot connection is connected, or None if none of them does."""
+        return _combine(publisher.is_connected() for publisher in self.publishers)
+
+    def is_enabled(self) -> Optional[bool]:
+        """Whether any publisher which receives the enabled flag has it set, or None if none of them does."""
+        return _combine(publisher.is_enabled() for publisher in self.publishers)
+
+    def requested_model(self) -> str:
+        """The first model requested through any publisher, or an empty string if none was."""
+        for publisher in self.publishers:
+            requested = publisher.requested_model()
+            if requested:
+                return requested
+        return ""
@@ -0,0 +1,68 @@
+"""File publisher for MLRun."""
+import base64
+import json
+import sys
+import time
+from abc import ABC
+from typing import Any, IO, Optional
+
+from mlrun import loader
+from mlrun.loader import ComponentType
+from mlrun.publishers.base import BasePublisher
+
+
+@loader.register(ComponentType.PUBLISHER)
+class FilePublisher(BasePublisher, ABC):
+    """
+    Appends every value to a file or pipe as a line of JSON, for recording sessions or feeding other programs.
+
+    Each line holds the wall-clock time, the key and the value. Bytes are written as base64 with "encoding" set to
+    "base64".
+    """
+
+    def __init__(self, path: str = "-", *args, **kwargs):
+        """
+        Initialize the publisher.
+        Args:
+            path: The file or named pipe to append to. Defaults to "-", which writes to standard output.
+        """
+        super().__init__(*args, **kwargs)
+        self.path = path
+        self.handle: Optional[IO[str]] = None
+
+    def enable(self) -> Any:
+        """
+        Open the file.
+        Returns:
+            The file handle.
+        """
+        self.handle = sys.stdout if self.path == "-" else open(self.path, "a", encoding="utf-8")
+        return self.handle
+
+    def disable(self):
+        """
+        Flush and close the file.
+        Returns:
+            Nothing.
+        """
+        self.handle.flush()
+        if self.handle is not sys.stdout:
+            self.handle.close()
+
+    def put(self, key: str, value: Any):
+        """
+        Write a value as a line of JSON.
+        Args:
+            key: The key to publish the value under.
+            value: A string, bytes, a boolean, a number or a sequence of numbers.
+        """
+        line = {"time": time.time(), "key": key}
+        if isinstance(value, (bytes, bytearray)):
+            line.update(value=base64.b64encode(value).decode("ascii"), encoding="base64")
+        else:
+            line.update(value=value if isinstance(value, (str, bool, int, float)) else list(value))
+        self.handle.write(json.dumps(line) + "\n")
+
+    def flush(self):
+        """Flush the lines written so far, so that readers of a pipe see them straight away."""
+        self.handle.flush()
@@ -1,8 +1,9 @@
 """NetworkTables publisher for MLRun."""
 import logging
 import sys
+import time
 from abc import ABC
-from typing import Any
+from typing import Any, Dict
 
 from mlrun import strings, loader
 from mlrun.loader import ComponentType
@@ -15,22 +16,31 @@ from _pynetworktables._impl.structs import ConnectionInfo
 NetworkTables = None  # type: ignore
 
 
+@loader.register(ComponentType.PUBLISHER)
 class NetworkTablesPublisher(BasePublisher, ABC):
     """Allows for publishing values to NetworkTables."""
-    def __init__(self, team: int = 1701, table: str = "SmartDashboard", prefix: str = "jetson", *args, **kwargs):
+    def __init__(self, team: int = 1701, table: str = "SmartDashboard", prefix: str = "jetson", rate: float = 0.0,
+                 *args, **kwargs):
         """
         Initialize NetworkTables parameters.
         Args:
             team: Team number for resolving NetworkTables server.
             table: Table name to push values to.
             prefix: Prefix for each key pushed to NetworkTables.
+            rate: The most times per second a value is written to each key by put. Defaults to zero, which writes
+                every value straight away.
         """
         super().__init__(*args, **kwargs)
         self.connected = False
+        self.enabled = False
+        self.model = ""
         self.team = team
         self.table_name = table
         self.prefix = prefix
+        self.rate = rate
         self.table = None
+        self._pending: Dict[str, Any] = {}
+        self._written: Dict[str, float] = {}
         self.logger = loader.load_component(
             ComponentType.LOGGER,
             configurations["desktop"]["logger"]["name"]
@@ -56,6 +66,11 @@ class NetworkTablesPublisher(BasePublisher, ABC):
         NetworkTables.addConnectionListener(self._connection_listener, True)  # type: ignore
         NetworkTables.initialize(server=f"roborio-{self.team}-frc.local")  # type: ignore
         self.table: NetworkTable = NetworkTables.getTable(self.table_name)  # type: ignore
+        # Follow the enabled flag through a listener rather than reading it every frame. Local notifications keep
+        # it in step with our own writes too.
+        self.table.addEntryListener(self._enabled_listener, immediateNotify=True, key=f"{self.prefix}/enabled",
+                                    localNotify=True)
+        self.table.addEntryListener(self._model_listener, immediateNotify=True, key=f"{self.prefix}/model")
         return self.table
 
     def disable(self):
@@ -66,14 +81,67 @@ class NetworkTablesPublisher(BasePublisher, ABC):
         """
         global NetworkTables
         self.logger.info(strings.networktables_unloading)
+        self.table.removeEntryListener(self._enabled_listener)
+        self.table.removeEntryListener(self._model_listener)
         NetworkTables.removeConnectionListener(self._connection_listener)
         NetworkTables.shutdown()
         self.logger.info(strings.networktables_unloaded)
 
+    def put(self, key: str, value: Any):
+        """
+        Publish a value, picking the entry type from the type of the value.
+
+        If a rate is set, the value is only queued, and the latest value queued for each key is written by flush once
+        enough time has passed since that key was last written.
+        Args:
+            key: The key to publish the value under.
+            value: A string, bytes, a boolean, a number or a sequence of numbers.
+        """
+        if self.rate > 0:
+            self._pending[key] = value
+        else:
+            self._write(key, value)
+
+    def _write(self, key: str, value: Any):
+        if isinstance(value, str):
+            self.table.putString(key, value)
+        elif isinstance(value, (bytes, bytearray)):
+            self.table.putRaw(key, bytes(value))
+        elif isinstance(value, bool):
+            self.table.putBoolean(key, value)
+        elif isinstance(value, (int, float)):
+            self.table.putNumber(key, value)
+        else:
+            self.table.putNumberArray(key, value)
+
+    def flush(self):
+        """
+        Write the queued values which are due and send every write made since the last flush straight away.
+        """
+        now = time.monotonic()
+        for key in [key for key in self._pending if now - self._written.get(key, float("-inf")) >= 1 / self.rate]:
+            self._write(key, self._pending.pop(key))
+            self._written[key] = now
+        NetworkTables.flush()  # type: ignore
+
     def is_connected(self) -> bool:
         """Whether or not there is a connection."""
         return self.connected
 
+    def is_enabled(self) -> bool:
+        """The last value of the enabled flag under the prefix."""
+        return self.enabled
+
+    def requested_model(self) -> str:
+        """The last model named under the prefix, or an empty string."""
+        return self.model
+
+    def _enabled_listener(self, table: NetworkTable, key: str, value: Any, is_new: bool):
+        self.enabled = bool(value)
+
+    def _model_listener(self, table: NetworkTable, key: str, value: Any, is_new: bool):
+        self.model = value if isinstance(value, str) else ""
+
     def _connection_listener(self, status: bool, connection: ConnectionInfo):
         if status:
             self.logger.info(strings.networktables_connection_established.format(
@@ -0,0 +1,159 @@
+"""Shared memory ring publisher for MLRun.
+
+Writes every value into a ring of fixed-size slots in a memory-mapped file under /dev/shm, where a consumer process
+on the same machine can read it without any system calls. The file starts with a 32-byte header:
+
+    magic "MLRN" (4 bytes), layout version (uint16), reserved (uint16), slot count (uint32), slot size (uint32),
+    reserved (8 bytes), sequence number of the latest entry (uint64)
+
+and each slot holds the sequence number of its entry (uint64), the entry length (uint32), four reserved bytes and
+an entry packed with mlrun.wire.pack_entry. All fields are little-endian. A slot's sequence number is zeroed while
+it is written, so readers can tell torn reads apart from complete ones. The header is padded so that its sequence
+number, and those of the slots when the slot size is a multiple of eight, are 8-byte aligned.
+"""
+import mmap
+import os
+import struct
+import tempfile
+from abc import ABC
+from typing import Any, List, Optional, Tuple
+
+from mlrun import loader, strings, wire
+from mlrun.loader import ComponentType
+from mlrun.publishers.base import BasePublisher
+
+MAGIC = b"MLRN"
+LAYOUT_VERSION = 2
+_HEADER = struct.Struct("<4sHHII8xQ")
+_SLOT = struct.Struct("<QI4x")
+_SEQUENCE = struct.Struct("<Q")
+
+
+def ring_path(name: str) -> str:
+    """
+    Get the path of the file backing a ring.
+    Args:
+        name: The name of the ring.
+
+    Returns:
+        The path under /dev/shm, or under the temporary directory where there is no /dev/shm.
+    """
+    directory = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    return os.path.join(directory, name)
+
+
+@loader.register(ComponentType.PUBLISHER)
+class SharedMemoryPublisher(BasePublisher, ABC):
+    """
+    Writes values into a shared memory ring, overwriting the oldest entries.
+    """
+
+    def __init__(self, prefix: str = "jetson", slots: int = 64, slot_size: int = 4096, *args, **kwargs):
+        """
+        Initialize the publisher.
+        Args:
+            prefix: The name of the ring. Defaults to "jetson".
+            slots: The amount of entries the ring holds. Defaults to 64.
+            slot_size: The size of each slot in bytes, including its 16-byte header. Defaults to 4096.
+        """
+        super().__init__(*args, **kwargs)
+        self.path = ring_path(f"mlrun-{prefix}")
+        self.slots = slots
+        self.slot_size = slot_size
+        self.sequence = 0
+        self.memory: Optional[mmap.mmap] = None
+
+    def enable(self) -> Any:
+        """
+        Create the ring and map it into memory.
+        Returns:
+            The memory map.
+        """
+        size = _HEADER.size + self.slots * self.slot_size
+        descriptor = os.open(self.path, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            os.ftruncate(descriptor, size)
+            self.memory = mmap.mmap(descriptor, size)
+        finally:
+            os.close(descriptor)
+        _HEADER.pack_into(self.memory, 0, MAGIC, LAYOUT_VERSION, 0, self.slots, self.slot_size, 0)
+        return self.memory
+
+    def disable(self):
+        """
+        Unmap and remove the ring. Readers which still have it mapped keep their view of it.
+        Returns:
+            Nothing.
+        """
+        self.memory.close()
+        os.unlink(self.path)
+
+    def put(self, key: str, value: Any):
+        """
+        Write a value into the next slot.
+        Args:
+            key: The key to publish the value under.
+            value: A string, bytes, a boolean, a number or a sequence of numbers.
+
+        Raises:
+            ValueError: If the packed value does not fit into a slot.
+        """
+        entry = wire.pack_entry(key, value)
+        if len(entry) > self.slot_size - _SLOT.size:
+            raise ValueError(strings.error_shared_memory_entry.format(size=len(entry), key=key,
+                                                                      limit=self.slot_size - _SLOT.size))
+        self.sequence += 1
+        offset = _HEADER.size + (self.sequence % self.slots) * self.slot_size
+        _SEQUENCE.pack_into(self.memory, offset, 0)
+        start = offset + _SLOT.size
+        self.memory[start:start + len(entry)] = entry
+        _SLOT.pack_into(self.memory, offset, self.sequence, len(entry))
+        _SEQUENCE.pack_into(self.memory, _HEADER.size - _SEQUENCE.size, self.sequence)
+
+
+class SharedMemoryReader:
+    """
+    Reads entries from a ring written by SharedMemoryPublisher, for consumers on the same machine.
+    """
+
+    def __init__(self, prefix: str = "jetson"):
+        """
+        Map an existing ring.
+        Args:
+            prefix: The name of the ring, which is the prefix of the publisher. Defaults to "jetson".
+        """
+        with open(ring_path(f"mlrun-{prefix}"), "rb") as handle:
+            self.memory = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _, self.slots, self.slot_size, _ = _HEADER.unpack_from(self.memory)
+        if magic != MAGIC or version != LAYOUT_VERSION:
+            raise ValueError(strings.error_shared_memory_layout.format(version=version, expected=LAYOUT_VERSION))
+
+    def close(self):
+        """Unmap the ring."""
+        self.memory.close()
+
+    @property
+    def sequence(self) -> int:
+        """The sequence number of the latest entry."""
+        return _SEQUENCE.unpack_from(self.memory, _HEADER.size - _SEQUENCE.size)[0]
+
+    def read(self, after: int = 0) -> Tuple[int, List[Tuple[str, Any]]]:
+        """
+        Read the entries written since an earlier read. Entries which were already overwritten are skipped.
+        Args:
+            after: The sequence number returned by the earlier read. Defaults to zero, which reads every entry still
+                in the ring.
+
+        Returns:
+            The sequence number to pass to the next read, and the keys and values of the entries, oldest first.
+        """
+        latest = self.sequence
+        entries = []
+        for sequence in range(max(after + 1, latest - self.slots + 1), latest + 1):
+            offset = _HEADER.size + (sequence % self.slots) * self.slot_size
+            written, length = _SLOT.unpack_from(self.memory, offset)
+            entry = self.memory[offset + _SLOT.size:offset + _SLOT.size + length]
+            # Skip entries which were overwritten while they were being read.
+            if written == sequence and _SEQUENCE.unpack_from(self.memory, offset)[0] == sequence:
+                entries.append(wire.unpack_entry(entry))
+        return latest, entries
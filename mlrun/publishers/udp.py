@@ -0,0 +1,60 @@
+"""UDP publisher for MLRun."""
+import socket
+from abc import ABC
+from typing import Any, Optional
+
+from mlrun import loader, wire
+from mlrun.loader import ComponentType
+from mlrun.publishers.base import BasePublisher
+
+
+@loader.register(ComponentType.PUBLISHER)
+class UDPPublisher(BasePublisher, ABC):
+    """
+    Sends every value as its own datagram, packed with mlrun.wire.pack_entry.
+
+    Nothing is acknowledged or resent, so a lost datagram is simply superseded by the next one.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 5800, *args, **kwargs):
+        """
+        Initialize the publisher.
+        Args:
+            host: The host to send datagrams to. Defaults to this machine.
+            port: The port to send datagrams to. Defaults to 5800, the first port FRC leaves open for teams.
+        """
+        super().__init__(*args, **kwargs)
+        self.host = host
+        self.port = port
+        self.socket: Optional[socket.socket] = None
+
+    def enable(self) -> Any:
+        """
+        Open the socket.
+        Returns:
+            The socket.
+        """
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.connect((self.host, self.port))
+        return self.socket
+
+    def disable(self):
+        """
+        Close the socket.
+        Returns:
+            Nothing.
+        """
+        self.socket.close()
+
+    def put(self, key: str, value: Any):
+        """
+        Send a value straight away.
+        Args:
+            key: The key to publish the value under.
+            value: A string, bytes, a boolean, a number or a sequence of numbers.
+        """
+        try:
+            self.socket.send(wire.pack_entry(key, value))
+        except ConnectionRefusedError:
+            # Nobody is listening yet; the next value will be tried again.
+            pass
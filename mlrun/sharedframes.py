@@ -0,0 +1,291 @@
+"""Shared memory frame ring and multi-process pipeline for MLRun.
+
+Frames are written once into preallocated slots of a multiprocessing.shared_memory block and read in place by other
+processes, so they are never pickled or copied between processes. Only slot indices travel through queues.
+
+Every slot is owned by at most one process at a time. A slot moves from free to writing (owned by the capture
+process), to ready, to reading (owned by an inference process) and back to free. When no slot is free, the oldest
+ready frame is dropped and its slot reused, so the workers always get the freshest frames.
+"""
+import multiprocessing
+import os
+import queue
+import time
+from typing import Any, Callable, Optional, Tuple
+
+import numpy as np  # type: ignore
+
+from mlrun import strings
+
+try:
+    from multiprocessing import shared_memory  # type: ignore
+except ImportError:  # Python versions before 3.8.
+    shared_memory = None  # type: ignore
+
+FREE, WRITING, READY, READING = range(4)
+
+
+class FrameRing:
+    """
+    A ring of frame slots in shared memory, with ownership tracking for each slot.
+    """
+
+    def __init__(self, slots: int, shape: Tuple[int, ...], name: Optional[str] = None, lock: Any = None,
+                 ready: Any = None):
+        """
+        Create a ring, or attach to one created by another process.
+        Args:
+            slots: The amount of frame slots.
+            shape: The shape of each frame, such as (height, width, 3).
+            name: The name of an existing ring to attach to. A new ring is created if None.
+            lock: The lock guarding slot states. Required when attaching.
+            ready: The queue of ready slots. Required when attaching.
+        """
+        if shared_memory is None:
+            raise RuntimeError(strings.error_shared_frames_unsupported)
+        self.slots = slots
+        self.shape = tuple(shape)
+        self.owner = name is None
+        frame_size = int(np.prod(self.shape))
+        # States and owners are int32, sequence numbers int64; the first sequence slot counts dropped frames and the
+        # last the latest sequence number handed out.
+        header = slots * 4 * 2 + (slots + 2) * 8
+        self.memory = shared_memory.SharedMemory(name=name, create=self.owner, size=header + slots * frame_size)
+        buffer = self.memory.buf
+        self.states = np.ndarray((slots,), dtype=np.int32, buffer=buffer)
+        self.owners = np.ndarray((slots,), dtype=np.int32, buffer=buffer, offset=slots * 4)
+        self._counters = np.ndarray((slots + 2,), dtype=np.int64, buffer=buffer, offset=slots * 8)
+        self.sequences = self._counters[1:-1]
+        self.frames = np.ndarray((slots,) + self.shape, dtype=np.uint8, buffer=buffer, offset=header)
+        if self.owner:
+            self.states[:] = FREE
+            self.owners[:] = 0
+            self._counters[:] = 0
+        self.lock = lock if lock is not None else multiprocessing.Lock()
+        self.ready = ready if ready is not None else multiprocessing.Queue()
+
+    def __reduce__(self):
+        # Other processes attach to the same block by name rather than receiving a copy of it.
+        return FrameRing, (self.slots, self.shape, self.memory.name, self.lock, self.ready)
+
+    @property
+    def dropped(self) -> int:
+        """The amount of ready frames whose slot was reused before any worker read them."""
+        return int(self._counters[0])
+
+    def acquire_write(self) -> int:
+        """
+        Take a slot to write a frame into, dropping the oldest ready frame if no slot is free.
+
+        Returns:
+            The index of the slot, or -1 if every slot is being written or read.
+        """
+        with self.lock:
+            free = np.flatnonzero(self.states == FREE)
+            if len(free):
+                index = int(free[0])
+            else:
+                ready = np.flatnonzero(self.states == READY)
+                if not len(ready):
+                    return -1
+                index = int(ready[np.argmin(self.sequences[ready])])
+                self._counters[0] += 1
+            self.states[index] = WRITING
+            self.owners[index] = os.getpid()
+            return index
+
+    def commit(self, index: int) -> int:
+        """
+        Hand a written slot over to the workers.
+        Args:
+            index: The index of the slot.
+
+        Returns:
+            The sequence number of the frame.
+        """
+        with self.lock:
+            self._counters[-1] += 1
+            sequence = int(self._counters[-1])
+            self.sequences[index] = sequence
+            self.states[index] = READY
+            self.owners[index] = 0
+        self.ready.put((index, sequence))
+        return sequence
+
+    def acquire_read(self, timeout: Optional[float] = None) -> Optional[Tuple[int, int]]:
+        """
+        Take the next ready slot to read a frame from.
+        Args:
+            timeout: Seconds to wait for a ready slot. Waits forever if None.
+
+        Returns:
+            The index of the slot and the sequence number of its frame, or None if none became ready in time.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            try:
+                index, sequence = self.ready.get(timeout=None if deadline is None else
+                                                 max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                return None
+            with self.lock:
+                # The slot may have been reused for a newer frame since it was queued.
+                if self.states[index] == READY and self.sequences[index] == sequence:
+                    self.states[index] = READING
+                    self.owners[index] = os.getpid()
+                    return index, sequence
+
+    def release(self, index: int):
+        """
+        Free a slot once its frame has been read.
+        Args:
+            index: The index of the slot.
+        """
+        with self.lock:
+            self.states[index] = FREE
+            self.owners[index] = 0
+
+    def reclaim(self, pid: int) -> int:
+        """
+        Free every slot owned by a process, such as one which died while holding them.
+        Args:
+            pid: The process ID.
+
+        Returns:
+            The amount of slots freed.
+        """
+        with self.lock:
+            owned = self.owners == pid
+            self.states[owned] = FREE
+            self.owners[owned] = 0
+            return int(owned.sum())
+
+    def close(self):
+        """Detach from the ring, and remove it if this process created it. Does nothing if already closed."""
+        if self.memory is None:
+            return
+        # Views into the block have to be gone before it can be closed.
+        self.states = self.owners = self._counters = self.sequences = self.frames = None
+        self.memory.close()
+        if self.owner:
+            self.memory.unlink()
+        self.memory = None
+
+
+def _capture_main(make_capture: Callable[[], Callable[[np.ndarray], None]], ring: FrameRing, results: Any,
+                  stop: Any):
+    try:
+        capture = make_capture()
+        while not stop.is_set():
+            index = ring.acquire_write()
+            if index < 0:
+                time.sleep(0.001)
+                continue
+            try:
+                capture(ring.frames[index])
+            except BaseException:
+                ring.release(index)
+                raise
+            ring.commit(index)
+    except BaseException as e:  # noqa
+        # Hand the error (usually EOFError) over to the publishing process.
+        results.put((-1, e))
+
+
+def _infer_main(make_infer: Callable[[], Callable[[np.ndarray], Any]], ring: FrameRing, results: Any, stop: Any):
+    try:
+        infer = make_infer()
+        while not stop.is_set():
+            taken = ring.acquire_read(timeout=0.1)
+            if taken is None:
+                continue
+            index, sequence = taken
+            try:
+                result = infer(ring.frames[index])
+            finally:
+                ring.release(index)
+            results.put((sequence, result))
+    except BaseException as e:  # noqa
+        results.put((-1, e))
+
+
+class ProcessPipeline:
+    """
+    Runs capture in one process and inference in several others, joined by a shared memory frame ring, and
+    publishes on the calling process.
+
+    Each process builds its own camera or engine from a factory, since neither survives being moved between
+    processes. Factories have to be picklable where processes are spawned rather than forked.
+    """
+
+    def __init__(self, make_capture: Callable[[], Callable[[np.ndarray], None]],
+                 make_infer: Callable[[], Callable[[np.ndarray], Any]], publish: Callable[[int, Any], None],
+                 shape: Tuple[int, ...], workers: int = 1, slots: int = 0):
+        """
+        Initialize the pipeline.
+        Args:
+            make_capture: Returns a function which captures the next frame into the array it is given.
+            make_infer: Returns a function which turns a frame into a result. The result is pickled.
+            publish: Consumes the sequence number of a frame and its result, in the order results arrive.
+            shape: The shape of each frame, such as (height, width, 3).
+            workers: The amount of inference processes. Defaults to one.
+            slots: The amount of frame slots. Defaults to two more than the amount of workers.
+        """
+        self.workers = max(1, workers)
+        self.ring = FrameRing(slots or self.workers + 2, shape)
+        self.publish = publish
+        self.results = multiprocessing.Queue()
+        self.dropped = 0
+        self.stop_event = multiprocessing.Event()
+        self.processes = [
+            multiprocessing.Process(target=_capture_main, args=(make_capture, self.ring, self.results,
+                                                                 self.stop_event),
+                                    name="mlrun-capture", daemon=True)
+        ] + [
+            multiprocessing.Process(target=_infer_main, args=(make_infer, self.ring, self.results, self.stop_event),
+                                    name=f"mlrun-infer-{i}", daemon=True)
+            for i in range(self.workers)
+        ]
+
+    def run(self):
+        """
+        Start the processes and publish results until stopped.
+
+        Errors raised in any process are re-raised here.
+        """
+        for process in self.processes:
+            process.start()
+        error: Optional[BaseException] = None
+        try:
+            while not self.stop_event.is_set():
+                try:
+                    sequence, result = self.results.get(timeout=0.1)
+                except queue.Empty:
+                    # Free the slots of workers which died without reporting an error.
+                    for process in self.processes:
+                        if not process.is_alive() and process.pid is not None:
+                            self.ring.reclaim(process.pid)
+                    continue
+                if sequence < 0:
+                    error = result
+                    break
+                self.publish(sequence, result)
+        finally:
+            self.stop()
+        if error is not None:
+            raise error
+
+    def stop(self):
+        """
+        Stop all processes, wait for them to finish and remove the ring.
+        """
+        self.stop_event.set()
+        for process in self.processes:
+            if process.pid is not None:
+                process.join(timeout=5.0)
+                if process.is_alive():
+                    process.terminate()
+        self.results.cancel_join_thread()
+        if self.ring.memory is not None:
+            self.dropped = self.ring.dropped
+        self.ring.close()
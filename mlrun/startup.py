@@ -0,0 +1,90 @@
+"""Parallel startup for MLRun.
+
+Opening cameras, loading the model and connecting to NetworkTables do not depend on each other, and each of them
+mostly waits on the disk, a device or the network. Running them as concurrent phases means startup takes about as
+long as the slowest of them rather than all of them together. Every phase is timed so that cold starts can be
+broken down.
+"""
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+
+
+class Startup:
+    """
+    Runs named startup phases, in parallel where their dependencies allow it.
+
+    Usage:
+        startup = Startup()
+        startup.add("engine", load_engine)
+        startup.add("warmup", warm_up, after=("engine",))
+        results = startup.run()
+    """
+
+    def __init__(self, parallel: bool = True):
+        """
+        Initialize the startup.
+        Args:
+            parallel: Whether to run independent phases at the same time. Defaults to True. If False, phases run one
+                after another in the order they were added.
+        """
+        self.parallel = parallel
+        self.started = time.perf_counter()
+        self.timings: Dict[str, Tuple[float, float]] = {}
+        self._phases: List[Tuple[str, Callable[[], Any], Tuple[str, ...]]] = []
+
+    def add(self, name: str, function: Callable[[], Any], after: Iterable[str] = ()):
+        """
+        Add a phase.
+        Args:
+            name: The name of the phase.
+            function: Runs the phase. Its return value is kept under the name of the phase.
+            after: The names of phases which have to finish first. They have to be added before this one.
+        """
+        self._phases.append((name, function, tuple(after)))
+
+    def _timed(self, name: str, function: Callable[[], Any]) -> Any:
+        start = time.perf_counter()
+        try:
+            return function()
+        finally:
+            self.timings[name] = (start - self.started, time.perf_counter() - start)
+
+    def run(self) -> Dict[str, Any]:
+        """
+        Run every phase and wait for all of them to finish.
+
+        Returns:
+            The return value of each phase by name.
+
+        Raises:
+            Exception: The first error raised by a phase, once every other phase has finished.
+        """
+        if not self.parallel:
+            return {name: self._timed(name, function) for name, function, _ in self._phases}
+        futures: Dict[str, Future] = {}
+
+        def phase(name: str, function: Callable[[], Any], after: Tuple[str, ...]) -> Any:
+            for dependency in after:
+                futures[dependency].result()
+            return self._timed(name, function)
+
+        # Every phase gets a thread of its own, so phases waiting on their dependencies never starve the others.
+        with ThreadPoolExecutor(max_workers=max(1, len(self._phases)), thread_name_prefix="mlrun-startup") as pool:
+            for name, function, after in self._phases:
+                futures[name] = pool.submit(phase, name, function, after)
+        return {name: future.result() for name, future in futures.items()}
+
+    def report(self) -> dict:
+        """
+        Summarize the phase timings.
+        Returns:
+            A dictionary from each phase name to when it started, relative to the creation of the startup, and how
+            long it took, plus the total time so far, all in milliseconds.
+        """
+        report: Dict[str, Any] = {
+            name: {"start": round(1000 * start, 1), "duration": round(1000 * duration, 1)}
+            for name, (start, duration) in self.timings.items()
+        }
+        report["total"] = round(1000 * (time.perf_counter() - self.started), 1)
+        return report
@@ -0,0 +1,157 @@
+"""Fixed-memory pipeline statistics for MLRun.
+
+Keeps a windowed mean FPS and windowed latency percentiles for each pipeline stage. Every update is O(1), and memory
+use does not grow with the length of a session. Updates and reads are locked, so several pipeline workers can record
+into the same statistics at once.
+"""
+import math
+import threading
+from array import array
+from typing import Dict, Iterable
+
+
+class RollingMean:
+    """
+    Mean of the last few samples.
+    """
+
+    def __init__(self, window: int = 300):
+        """
+        Initialize the window.
+        Args:
+            window: The amount of samples to average over. Defaults to 300.
+        """
+        self._samples = array("d", [0.0] * max(1, window))
+        self._index = 0
+        self._count = 0
+        self._total = 0.0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def add(self, value: float):
+        """Add a sample, evicting the oldest one if the window is full."""
+        with self._lock:
+            self._total += value - self._samples[self._index]
+            self._samples[self._index] = value
+            self._index = (self._index + 1) % len(self._samples)
+            self._count = min(self._count + 1, len(self._samples))
+
+    @property
+    def mean(self) -> float:
+        """The mean of the samples in the window, or zero if there are none."""
+        with self._lock:
+            return self._total / self._count if self._count else 0.0
+
+
+class LatencyHistogram:
+    """
+    Histogram of the last few latency samples.
+
+    Samples are counted in logarithmically spaced buckets, so percentiles are accurate to within the bucket growth
+    factor (five percent by default) and cost a fixed amount of work regardless of the window size.
+    """
+
+    def __init__(self, window: int = 300, minimum: float = 1e-5, maximum: float = 10.0, growth: float = 1.05):
+        """
+        Initialize the histogram.
+        Args:
+            window: The amount of samples to keep. Defaults to 300.
+            minimum: The smallest latency told apart, in seconds. Defaults to ten microseconds.
+            maximum: The largest latency told apart, in seconds. Defaults to ten seconds.
+            growth: The ratio between the bounds of neighbouring buckets. Defaults to 1.05.
+        """
+        self.minimum = minimum
+        self._log_minimum = math.log(minimum)
+        self._log_growth = math.log(growth)
+        self._growth = growth
+        self._counts = array("l", [0] * (int(math.ceil(math.log(maximum / minimum) / self._log_growth)) + 2))
+        self._window = array("l", [-1] * max(1, window))
+        self._index = 0
+        self._count = 0
+        self.total = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _bucket(self, seconds: float) -> int:
+        if seconds <= self.minimum:
+            return 0
+        return min(len(self._counts) - 1, int((math.log(seconds) - self._log_minimum) / self._log_growth) + 1)
+
+    def add(self, seconds: float):
+        """Add a latency sample in seconds, evicting the oldest one if the window is full."""
+        bucket = self._bucket(seconds)
+        with self._lock:
+            evicted = self._window[self._index]
+            if evicted >= 0:
+                self._counts[evicted] -= 1
+            self._counts[bucket] += 1
+            self._window[self._index] = bucket
+            self._index = (self._index + 1) % len(self._window)
+            self._count = min(self._count + 1, len(self._window))
+            self.total += 1
+
+    def percentile(self, percent: float) -> float:
+        """
+        Estimate a percentile of the samples in the window.
+        Args:
+            percent: The percentile to estimate, between 0 and 100.
+
+        Returns:
+            The upper bound of the bucket holding the percentile in seconds, or zero if there are no samples.
+        """
+        with self._lock:
+            if self._count == 0:
+                return 0.0
+            rank = max(1, int(math.ceil(self._count * percent / 100)))
+            seen = 0
+            for bucket, count in enumerate(self._counts):
+                seen += count
+                if seen >= rank:
+                    return self.minimum * self._growth ** bucket
+        return self.minimum * self._growth ** (len(self._counts) - 1)
+
+
+class PipelineStats:
+    """
+    Windowed FPS and per-stage latency statistics for the pipeline.
+    """
+    STAGES = ("capture", "preprocess", "infer", "postprocess", "publish")
+    PERCENTILES = (50, 95, 99)
+
+    def __init__(self, window: int = 300, stages: Iterable[str] = STAGES):
+        """
+        Initialize the statistics.
+        Args:
+            window: The amount of frames to keep statistics for. Defaults to 300.
+            stages: The names of the stages to keep latencies for.
+        """
+        self.fps = RollingMean(window)
+        self.stages: Dict[str, LatencyHistogram] = {stage: LatencyHistogram(window) for stage in stages}
+
+    def record(self, stage: str, seconds: float):
+        """
+        Record how long a stage took for one frame.
+        Args:
+            stage: The name of the stage.
+            seconds: The time it took.
+        """
+        self.stages[stage].add(seconds)
+
+    def summary(self) -> dict:
+        """
+        Summarize the statistics.
+        Returns:
+            A dictionary holding the mean FPS and, for each stage with samples, its latency percentiles in
+            milliseconds.
+        """
+        return {
+            "fps": round(self.fps.mean, 1),
+            "stages": {
+                name: {f"p{p}": round(1000 * histogram.percentile(p), 2) for p in self.PERCENTILES}
+                for name, histogram in self.stages.items() if len(histogram) > 0
+            }
+        }
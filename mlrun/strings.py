@@ -7,6 +7,8 @@ opencv_loading: str = "Loading OpenCV..."
 opencv_successful: str = "Successfully loaded OpenCV."
 opencv_unsuccessful: str = "Unable to load OpenCV. Make sure that you have installed OpenCV on your path."
 opencv_camera_error: str = "OpenCV was unable to open the camera /dev/video{cam}. Please check your configuration."
+multiple_cameras: str = "Running {count} cameras through one engine: {names}."
+grabber_timeout: str = "The camera did not provide a frame within {timeout} seconds."
 networktables_loading: str = "Loading NetworkTables..."
 networktables_successful: str = "Successfully loaded NetworkTables."
 networktables_unsuccessful: str = "NetworkTables support is enabled, but PyNetworkTables could not be found in " \
@@ -22,21 +24,59 @@ tensorflow_model_missing: str = "A model was not found in the specified location
 tensorflow_loading_model: str = "Please wait for TensorFlow to load the model into memory. This may take a long " \
                                 "period of time depending on which platform you are using."
 tensorflow_loaded_model: str = "Model has finished loading; inference will begin once input is provided."
+tensorflow_raw_input: str = "The model accepts raw images; frames will be passed to it without encoding."
+tensorflow_encoded_input: str = "The model only accepts encoded images; every frame will be encoded as a JPEG first. " \
+                                "Export the model with an image_tensor input for better performance."
+tensorflow_cached_graph: str = "Loaded the {mode} graph for this model from the cache at {path}."
+tensorflow_optimizing: str = "Optimizing the model into a {mode} graph; this only happens once for each model."
+tensorflow_optimized: str = "Saved the {mode} graph to the cache at {path} after {seconds} seconds."
+tensorflow_trt_unavailable: str = "TF-TRT is not available ({error}); falling back to a frozen graph."
+hot_swap_loading: str = "Loading the model at {path} in the background; the current model keeps running meanwhile."
+hot_swap_switched: str = "Switched to the model at {path}, {seconds} seconds after loading began."
+hot_swap_failed: str = "Failed to load the model at {path}; the current model stays in use. {error}"
 tflite_not_found: str = "TensorFlow Lite could not be found. You may be missing some dependencies."
 tflite_model_present: str = "Found a TensorFlow Lite model in the configured path."
 tflite_coral_model_present: str = "Found a Coral Edge TPU model in the configured path."
 tflite_model_missing: str = "Unable to load a TensorFlow Lite model from the configured path. Please check your " \
                             "configuration and try again."
+tflite_model_mapped: str = "Mapping the TensorFlow Lite model into memory; its pages are shared with other processes."
+tflite_model_buffered: str = "Reading the TensorFlow Lite model into a private buffer."
+tflite_pool_created: str = "Created a pool of {count} TensorFlow Lite interpreters on {devices}."
+tflite_delegate_failed: str = "Failed to load the Edge TPU delegate for device {device}; it will not be used."
+tflite_device_failed: str = "Interpreter on device {device} failed and will no longer be used ({left} left): {error}"
+tflite_no_devices_left: str = "Every TensorFlow Lite interpreter has failed; inference cannot continue."
+tflite_enumeration_unsupported: str = "PyCoral is not installed, so Edge TPU devices cannot be listed; using the " \
+                                      "default device."
+tflite_num_threads_unsupported: str = "This version of TensorFlow Lite cannot limit its thread count; ignoring " \
+                                      "the configured amount of threads."
 debug_log: str = "FPS: {fps}; top left: ({xmin}, {ymin}); bottom right: ({xmin}, {ymin})"
+startup_report: str = "Startup phases: {report}"
+first_detections: str = "First detections published {seconds} seconds after startup began."
+stats_report: str = "Pipeline statistics: {summary}"
+profiler_report: str = "Stage timings: {report}"
+bench_no_frames: str = "No frames could be read from {source}."
+bench_allocation_exceeded: str = "Preprocessing and inference allocated {allocated} bytes per frame, more than " \
+                                  "the limit of {limit} bytes."
+bench_nms_exceeded: str = "Non-maximum suppression of {candidates} candidates took {time} ms, more than the " \
+                           "budget of {budget} ms."
 stopped_nt: str = "Pipeline stopped by NetworkTables disable command."
 stopped_keyboard: str = "Pipeline stopped with KeyboardInterrupt."
 error_wrong_arguments: str = "Incorrect number of arguments.\nMLRun should be invoked as follows:\n\tpython3 -m mlrun" \
                              " [config_name]"
 error_camera_fault: str = "Camera ID /dev/video{id} did not provide any content when requested."
 error_nonexistant_config: str = "The provided configuration name does not exist. You may have to create it yet."
+error_invalid_roi: str = "The region of interest {roi} is invalid. It should look like x,y,width,height."
+error_invalid_tiling_mode: str = "The tiling mode {mode} is invalid. It should be one of none, tiles or roi."
+error_invalid_wire_format: str = "The publisher format {format} is invalid. It should be one of json, raw or numbers."
+error_invalid_optimize: str = "The engine optimization {mode} is invalid. It should be one of none, frozen or trt."
+error_shared_memory_entry: str = "The value for {key} takes {size} bytes, but shared memory slots only hold {limit}."
+error_shared_memory_layout: str = "The shared memory ring uses layout version {version}, but version {expected} was " \
+                                  "expected."
+error_shared_frames_unsupported: str = "Shared memory frame rings need Python 3.8 or newer."
 error_base_import: str = "You cannot import the base {component}!"
 error_component_not_found: str = "The requested {component}, {name}, was not found."
 warning_coloredlogs: str = "Coloredlogs is not present; logs will be less readable and difficult to understand."
 warning_config_name: str = "WARNING: Configuration not specified; assuming \"desktop\" configuration."
+warning_profiler: str = "Profiling is enabled. Stage timings will be reported periodically."
 warning_show_debug: str = "Showing the output from the pipeline in a window will dramatically reduce " \
                           "performance. You have been warned!"
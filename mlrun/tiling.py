@@ -0,0 +1,255 @@
+"""Tiled and region-of-interest inference for MLRun.
+
+Instead of squeezing the whole frame down to the input size of the model, the frame is split into overlapping tiles
+at native resolution (or cropped to a single region of interest), every tile is inferred upon, and the boxes are
+mapped back to coordinates relative to the whole frame. Boxes which were cut in two by a tile border are merged.
+"""
+from typing import Dict, List, NamedTuple, Tuple
+
+import numpy as np  # type: ignore
+
+from mlrun import strings
+from mlrun.util import Detections, filter_confidence
+
+
+class Tile(NamedTuple):
+    """A rectangle of a frame, in pixels."""
+    x: int
+    y: int
+    width: int
+    height: int
+
+
+def _positions(length: int, tile: int, overlap: int) -> List[int]:
+    if tile >= length:
+        return [0]
+    stride = max(1, tile - overlap)
+    positions = list(range(0, length - tile, stride))
+    positions.append(length - tile)
+    return positions
+
+
+def make_tiles(frame_width: int, frame_height: int, tile_width: int, tile_height: int, overlap: int) -> List[Tile]:
+    """
+    Cover a frame with overlapping tiles.
+    Args:
+        frame_width: The width of the frame.
+        frame_height: The height of the frame.
+        tile_width: The width of each tile. Tiles are shrunk to the frame if they are bigger.
+        tile_height: The height of each tile. Tiles are shrunk to the frame if they are bigger.
+        overlap: The amount of pixels neighbouring tiles share.
+
+    Returns:
+        The tiles, row by row.
+    """
+    width = min(tile_width, frame_width)
+    height = min(tile_height, frame_height)
+    return [
+        Tile(x, y, width, height)
+        for y in _positions(frame_height, height, overlap)
+        for x in _positions(frame_width, width, overlap)
+    ]
+
+
+def parse_roi(roi: str, frame_width: int, frame_height: int) -> Tile:
+    """
+    Parse a region of interest and clamp it to the frame.
+    Args:
+        roi: The region as "x,y,width,height" in pixels.
+        frame_width: The width of the frame.
+        frame_height: The height of the frame.
+
+    Returns:
+        The region as a tile.
+    """
+    try:
+        x, y, width, height = (int(value) for value in roi.split(","))
+    except ValueError:
+        raise ValueError(strings.error_invalid_roi.format(roi=roi))
+    x = min(max(0, x), frame_width - 1)
+    y = min(max(0, y), frame_height - 1)
+    return Tile(x, y, max(1, min(width, frame_width - x)), max(1, min(height, frame_height - y)))
+
+
+def to_frame(detections: Detections, tile: Tile, frame_width: int, frame_height: int) -> Detections:
+    """
+    Map boxes normalized to a tile so that they are normalized to the whole frame.
+    Args:
+        detections: Detections from inference on the tile.
+        tile: The tile inferred upon.
+        frame_width: The width of the frame.
+        frame_height: The height of the frame.
+
+    Returns:
+        The same detections with boxes relative to the frame.
+    """
+    scale = np.array([tile.height / frame_height, tile.width / frame_width] * 2)
+    offset = np.array([tile.y / frame_height, tile.x / frame_width] * 2)
+    boxes = np.clip(np.asarray(detections.boxes, dtype=float), 0, 1) * scale + offset
+    return Detections(detections.scores, boxes, detections.classes)
+
+
+def merge(detections: List[Detections], regions: np.ndarray, threshold: float) -> Detections:
+    """
+    Combine detections from several tiles, merging boxes that were cut in two by a tile border.
+
+    Two boxes from different tiles are compared only within the seam, where their tiles meet: both are clipped to
+    the overlap of the two tiles, and they are merged into the box enclosing both when the intersection over union of
+    the clipped boxes exceeds the threshold. Where tiles abut without overlapping, the seam is a line; both boxes then
+    have to reach it, and only their extents along it are compared. This links an object seen whole by two
+    overlapping tiles and the two halves of an object cut by a border, but not distinct objects side by side across a
+    seam, which do not cover the same part of it. The merged box keeps the highest score and its class.
+    Args:
+        detections: Detections from each tile, with boxes relative to the frame.
+        regions: The tiles as (ymin, xmin, ymax, xmax) rows relative to the frame, in the order of the detections.
+        threshold: The intersection over union within the seam above which two boxes are merged.
+
+    Returns:
+        The combined detections.
+    """
+    scores = np.concatenate([d.scores for d in detections]).astype(float)
+    boxes = np.concatenate([np.asarray(d.boxes, dtype=float).reshape(-1, 4) for d in detections])
+    classes = np.concatenate([d.classes for d in detections])
+    owners = np.repeat(np.arange(len(detections)), [len(d.scores) for d in detections])
+    if len(scores) < 2:
+        return Detections(scores, boxes, classes)
+
+    # The seam of every pair of boxes is the overlap of their tiles; it is empty along an axis if the tiles do not
+    # meet, and has no extent along an axis where they abut.
+    tiles = np.asarray(regions, dtype=float)[owners]
+    low = np.maximum(tiles[:, None, :2], tiles[None, :, :2])
+    high = np.minimum(tiles[:, None, 2:], tiles[None, :, 2:])
+    line = high - low < 1e-3
+    meets = (high - low >= -1e-3).all(axis=2)
+
+    def clip(corners: np.ndarray) -> np.ndarray:
+        return np.minimum(np.maximum(corners, low), high)
+
+    first_low, first_high = clip(boxes[:, None, :2]), clip(boxes[:, None, 2:])
+    second_low, second_high = clip(boxes[None, :, :2]), clip(boxes[None, :, 2:])
+    # Both boxes have to reach into the seam along both axes.
+    reaches = ((boxes[:, None, :2] <= high + 1e-3) & (boxes[:, None, 2:] >= low - 1e-3) &
+               (boxes[None, :, :2] <= high + 1e-3) & (boxes[None, :, 2:] >= low - 1e-3)).all(axis=2)
+    # Extents along a seam line do not count towards the overlap.
+    shared = np.where(line, 1.0, np.maximum(np.minimum(first_high, second_high) -
+                                            np.maximum(first_low, second_low), 0)).prod(axis=2)
+    first = np.where(line, 1.0, first_high - first_low).prod(axis=2)
+    second = np.where(line, 1.0, second_high - second_low).prod(axis=2)
+    overlap = shared / np.maximum(first + second - shared, 1e-12)
+    linked = meets & reaches & (overlap > threshold) & (owners[:, None] != owners[None, :])
+
+    # Group linked boxes with a union-find over the (usually very few) linked pairs.
+    parents = list(range(len(scores)))
+
+    def find(i: int) -> int:
+        while parents[i] != i:
+            parents[i] = parents[parents[i]]
+            i = parents[i]
+        return i
+
+    for i, j in zip(*np.nonzero(np.triu(linked, 1))):
+        parents[find(i)] = find(j)
+    groups: Dict[int, List[int]] = {}
+    for i in range(len(scores)):
+        groups.setdefault(find(i), []).append(i)
+
+    members = list(groups.values())
+    best = [group[int(np.argmax(scores[group]))] for group in members]
+    merged = np.array([
+        np.concatenate([boxes[group, :2].min(axis=0), boxes[group, 2:].max(axis=0)]) for group in members
+    ])
+    return Detections(scores[best], merged, classes[best])
+
+
+class Tiler:
+    """
+    Splits frames into tiles before inference and joins the detections afterwards.
+    """
+
+    def __init__(self, mode: str = "none", tile_width: int = 0, tile_height: int = 0, overlap: int = 0,
+                 roi: str = "", threshold: float = 0.5):
+        """
+        Initialize the tiler.
+        Args:
+            mode: One of "none", "tiles" or "roi". Defaults to "none", which infers upon whole frames.
+            tile_width: The width of each tile in "tiles" mode.
+            tile_height: The height of each tile in "tiles" mode.
+            overlap: The amount of pixels neighbouring tiles share in "tiles" mode.
+            roi: The region of interest as "x,y,width,height" in "roi" mode.
+            threshold: The intersection over union within the seam of their tiles above which two boxes from
+                different tiles are merged.
+        """
+        if mode not in ("none", "tiles", "roi"):
+            raise ValueError(strings.error_invalid_tiling_mode.format(mode=mode))
+        self.mode = mode
+        self.tile_width = tile_width
+        self.tile_height = tile_height
+        self.overlap = overlap
+        self.roi = roi
+        self.threshold = threshold
+        self._tiles: Dict[Tuple[int, int], List[Tile]] = {}
+
+    @property
+    def enabled(self) -> bool:
+        """Whether frames are split at all."""
+        return self.mode != "none"
+
+    def tiles(self, frame_width: int, frame_height: int) -> List[Tile]:
+        """
+        Get the tiles for a frame size. They are only computed once for each size.
+        """
+        size = (frame_width, frame_height)
+        if size not in self._tiles:
+            if self.mode == "roi":
+                self._tiles[size] = [parse_roi(self.roi, frame_width, frame_height)]
+            elif self.mode == "tiles":
+                self._tiles[size] = make_tiles(frame_width, frame_height, self.tile_width, self.tile_height,
+                                               self.overlap)
+            else:
+                self._tiles[size] = [Tile(0, 0, frame_width, frame_height)]
+        return self._tiles[size]
+
+    def split(self, frames: List[np.ndarray]) -> List[np.ndarray]:
+        """
+        Crop frames into their tiles.
+        Args:
+            frames: The frames to split.
+
+        Returns:
+            Views of every tile of every frame, frame by frame.
+        """
+        crops = []
+        for frame in frames:
+            for tile in self.tiles(frame.shape[1], frame.shape[0]):
+                crops.append(frame[tile.y:tile.y + tile.height, tile.x:tile.x + tile.width])
+        return crops
+
+    def join(self, frames: List[np.ndarray], detections: List[Detections], min_score: float = 0.0) -> List[Detections]:
+        """
+        Join the detections of every tile back into detections for each frame.
+        Args:
+            frames: The frames which were split.
+            detections: The detections for each tile, in the order split returned them.
+            min_score: The minimum score of detections to keep. Applied before merging, so that low-confidence
+                boxes do not grow the merged ones.
+
+        Returns:
+            The detections for each frame, with boxes relative to the whole frame.
+        """
+        joined = []
+        index = 0
+        for frame in frames:
+            height, width = frame.shape[:2]
+            tiles = self.tiles(width, height)
+            mapped = [
+                to_frame(filter_confidence(detections[index + i], min_score), tile, width, height)
+                for i, tile in enumerate(tiles)
+            ]
+            index += len(tiles)
+            if len(mapped) > 1:
+                regions = np.array([[tile.y / height, tile.x / width, (tile.y + tile.height) / height,
+                                     (tile.x + tile.width) / width] for tile in tiles])
+                joined.append(merge(mapped, regions, self.threshold))
+            else:
+                joined.append(mapped[0])
+        return joined
@@ -0,0 +1,183 @@
+"""Frame skipping and lightweight tracking for MLRun.
+
+The engine only runs on some frames. In between, the last detections are carried forward by a tracker which
+associates boxes between detections by intersection over union and moves each one at a constant velocity, so that
+results can be published at the camera's frame rate while the accelerator runs at a fraction of it.
+"""
+from typing import List
+
+import numpy as np  # type: ignore
+
+from mlrun.util import Detections
+
+
+def iou_matrix(first: np.ndarray, second: np.ndarray) -> np.ndarray:
+    """
+    Compute the intersection over union of every pair of boxes.
+    Args:
+        first: An (N, 4) array of (ymin, xmin, ymax, xmax) boxes.
+        second: An (M, 4) array of (ymin, xmin, ymax, xmax) boxes.
+
+    Returns:
+        An (N, M) array of overlaps.
+    """
+    heights = np.minimum.outer(first[:, 2], second[:, 2]) - np.maximum.outer(first[:, 0], second[:, 0])
+    widths = np.minimum.outer(first[:, 3], second[:, 3]) - np.maximum.outer(first[:, 1], second[:, 1])
+    intersection = np.clip(heights, 0, None) * np.clip(widths, 0, None)
+    first_areas = (first[:, 2] - first[:, 0]) * (first[:, 3] - first[:, 1])
+    second_areas = (second[:, 2] - second[:, 0]) * (second[:, 3] - second[:, 1])
+    union = np.add.outer(first_areas, second_areas) - intersection
+    return intersection / np.maximum(union, 1e-12)
+
+
+class Tracker:
+    """
+    Carries detections forward between engine runs with a constant-velocity model.
+
+    Each track keeps the box it was last detected at, its velocity in box units per frame and the amount of frames
+    since it was last detected. All tracks are held in arrays, so each update costs a handful of array operations.
+    """
+
+    def __init__(self, iou_threshold: float = 0.3, max_age: int = 10):
+        """
+        Initialize the tracker.
+        Args:
+            iou_threshold: The smallest overlap between a predicted box and a detection for them to be associated.
+                Defaults to 0.3.
+            max_age: The amount of frames a track is predicted for without being detected again. Defaults to ten.
+        """
+        self.iou_threshold = iou_threshold
+        self.max_age = max_age
+        self.boxes = np.empty((0, 4))
+        self.velocities = np.empty((0, 4))
+        self.ages = np.empty(0, dtype=int)
+        self.scores = np.empty(0)
+        self.classes = np.empty(0)
+
+    def __len__(self) -> int:
+        return len(self.scores)
+
+    def _predicted(self) -> np.ndarray:
+        return np.clip(self.boxes + self.velocities * self.ages[:, None], 0, 1)
+
+    def _current(self) -> Detections:
+        return Detections(self.scores.copy(), self._predicted(), self.classes.copy())
+
+    def update(self, detections: Detections) -> Detections:
+        """
+        Associate fresh detections with the tracks and correct them.
+
+        Each detection is matched greedily, best overlap first, to the predicted box of a track of the same class.
+        Matched tracks take the detected box and re-estimate their velocity; unmatched detections start new tracks
+        and unmatched tracks are dropped.
+        Args:
+            detections: Filtered detections from the engine for the current frame.
+
+        Returns:
+            The same detections.
+        """
+        boxes = np.asarray(detections.boxes, dtype=float).reshape(-1, 4)
+        scores = np.asarray(detections.scores, dtype=float)
+        classes = np.asarray(detections.classes)
+        velocities = np.zeros_like(boxes)
+        if len(self) and len(boxes):
+            overlaps = iou_matrix(self._predicted(), boxes)
+            overlaps[self.classes[:, None] != classes[None, :]] = 0
+            tracks, found = np.unravel_index(np.argsort(-overlaps, axis=None), overlaps.shape)
+            matched_tracks, matched_found = set(), set()
+            for track, detection in zip(tracks, found):
+                if overlaps[track, detection] <= self.iou_threshold:
+                    break
+                if track in matched_tracks or detection in matched_found:
+                    continue
+                matched_tracks.add(track)
+                matched_found.add(detection)
+                elapsed = self.ages[track] + 1
+                velocities[detection] = (boxes[detection] - self.boxes[track]) / elapsed
+        self.boxes = boxes
+        self.velocities = velocities
+        self.ages = np.zeros(len(boxes), dtype=int)
+        self.scores = scores
+        self.classes = classes
+        return detections
+
+    def predict(self) -> Detections:
+        """
+        Advance every track by one frame without a detection.
+
+        Returns:
+            The predicted detections for the frame, in the same form as the engine returns them.
+        """
+        self.ages += 1
+        alive = self.ages <= self.max_age
+        if not alive.all():
+            self.boxes = self.boxes[alive]
+            self.velocities = self.velocities[alive]
+            self.ages = self.ages[alive]
+            self.scores = self.scores[alive]
+            self.classes = self.classes[alive]
+        return self._current()
+
+
+class DetectionScheduler:
+    """
+    Decides which frames the engine runs on.
+
+    The engine runs on every interval-th frame, and also on the next frame whenever the least confident detection
+    of the last run scored below the confidence threshold.
+    """
+
+    def __init__(self, interval: int = 1, confidence: float = 0.0):
+        """
+        Initialize the scheduler.
+        Args:
+            interval: Run the engine at least once every this many frames. Defaults to one, which runs it on every
+                frame.
+            confidence: Run the engine on the next frame if any detection scored below this. Defaults to zero, which
+                disables the adaptive runs.
+        """
+        self.interval = max(1, interval)
+        self.confidence = confidence
+        self._skipped = self.interval
+        self._uncertain = False
+
+    def due(self) -> bool:
+        """
+        Check whether the engine should run on the current frame. Call this once per frame.
+        """
+        if self._uncertain or self._skipped >= self.interval - 1:
+            self._skipped = 0
+            return True
+        self._skipped += 1
+        return False
+
+    def detected(self, scores: np.ndarray):
+        """
+        Tell the scheduler the scores of the latest engine run.
+        Args:
+            scores: The scores of the filtered detections.
+        """
+        self._uncertain = bool(len(scores)) and float(np.min(scores)) < self.confidence
+
+
+def update_tracks(trackers: List[Tracker], scheduler: DetectionScheduler, detections: List[Detections],
+                  inferred: List[bool]):
+    """
+    Feed an engine run to the tracker of every camera and to the scheduler.
+
+    Cameras whose frame was not inferred upon, such as ones held back by the motion gate, are left alone: their
+    detections were reused from an earlier run, so feeding them back would pull every track onto its old box, reset
+    its velocity and count old scores as a fresh run.
+    Args:
+        trackers: The tracker of each camera.
+        scheduler: The scheduler deciding which frames the engine runs on.
+        detections: The filtered detections of each camera.
+        inferred: Whether each camera's frame was inferred upon in this run.
+    """
+    scores = []
+    for tracker, detected, fresh in zip(trackers, detections, inferred):
+        if fresh:
+            tracker.update(detected)
+            scores.append(np.asarray(detected.scores, dtype=float))
+    if scores:
+        scheduler.detected(np.concatenate(scores))
@@ -1,13 +1,26 @@
 """
 Simple utilities to reduce verbosity in the starting point.
 """
-from typing import Callable
+from typing import Any, Callable, NamedTuple, Optional
 import json
 import cv2  # type: ignore
 import numpy as np  # type: ignore
 
+from mlrun import wire
 
-def filter_confidence(unfiltered: list, min_score: float) -> list:
+
+class Detections(NamedTuple):
+    """
+    Raw detections as returned by an engine, one row per detection.
+
+    Boxes are normalized to the range [0, 1] and ordered as (ymin, xmin, ymax, xmax).
+    """
+    scores: np.ndarray
+    boxes: np.ndarray
+    classes: np.ndarray
+
+
+def filter_confidence(unfiltered: Detections, min_score: float) -> Detections:
     """
     Filter inference results by confidence.
     Args:
@@ -15,7 +28,7 @@ def filter_confidence(unfiltered: list, min_score: float) -> list:
         min_score: The minimum score that is required for an item to pass.
 
     Returns:
-        A list of inference results which have the required confidence.
+        The inference results which have the required confidence.
 
     Notes:
         Roughly equivalent to the original lambda used, which was:
@@ -24,18 +37,12 @@ def filter_confidence(unfiltered: list, min_score: float) -> list:
                 if unfiltered[i][0] > engine_config["min_score"]
             ]
     """
-    output = []
-    length: int = len(unfiltered)
-    if length >= 1:
-        for i in range(length):
-            score = unfiltered[i][0]
-            if score > min_score:
-                output.append(unfiltered[i])
-    return output
+    mask = unfiltered.scores > min_score
+    return Detections(unfiltered.scores[mask], unfiltered.boxes[mask], unfiltered.classes[mask])
 
 
-def normalize(filtered: list, camera_width: int, camera_height: int, inference_width: int,
-              inference_height: int) -> list:
+def normalize(filtered: Detections, camera_width: int, camera_height: int, inference_width: int,
+              inference_height: int) -> np.ndarray:
     """
     Normalize the floating point coordinates into pixel values, and convert the inference results into
     a human-understandable format.
@@ -47,25 +54,85 @@ def normalize(filtered: list, camera_width: int, camera_height: int, inference_w
         inference_height: The height of the output image from the inference process.
 
     Returns:
-        The normalized values.
-    """
-    output = []
-    for i in filtered:
-        # This stuff is complicated. Long story short, the inference process returns values relative to
-        # its expected input size, which need to be changed to the values relative to the size of the camera's
-        # input.
-        one = int(((max(1, i[1][0] * inference_height)) / inference_height) * camera_height)
-        two = int(((max(1, i[1][1] * inference_width)) / inference_width) * camera_width)
-        three = int((min(inference_height, (i[1][2] * inference_height)) / inference_height) * camera_height)
-        four = int((min(inference_width, (i[1][3] * inference_width)) / inference_width) * camera_width)
-        confidence = round(100 * i[0], 1)
-        output.append([
-            four, three, two, one, confidence
-        ])
+        The normalized values, one (xmax, ymax, xmin, ymin, confidence) row per detection.
+    """
+    # This stuff is complicated. Long story short, the inference process returns values relative to
+    # its expected input size, which need to be changed to the values relative to the size of the camera's
+    # input.
+    inference_size = np.array([inference_height, inference_width, inference_height, inference_width], dtype=float)
+    camera_size = np.array([camera_height, camera_width, camera_height, camera_width], dtype=float)
+    pixels = np.asarray(filtered.boxes, dtype=float).reshape(-1, 4) * inference_size
+    pixels[:, :2] = np.maximum(1, pixels[:, :2])
+    pixels[:, 2:] = np.minimum(inference_size[2:], pixels[:, 2:])
+    coordinates = np.trunc(pixels / inference_size * camera_size)
+    output = np.empty((len(pixels), 5))
+    output[:, :4] = coordinates[:, ::-1]
+    output[:, 4] = np.round(100 * np.asarray(filtered.scores, dtype=float), 1)
     return output
 
 
-def humanize(normalized: list, t1: int, t2: int, freq: float) -> dict:
+def non_max_suppression(detections: Detections, iou_threshold: float, class_aware: bool = True) -> Detections:
+    """
+    Suppress detections which overlap a higher-scoring detection.
+    Args:
+        detections: The detections to suppress duplicates in.
+        iou_threshold: Detections whose intersection over union with a kept detection exceeds this are dropped.
+        class_aware: Whether only detections of the same class suppress each other. Defaults to True.
+
+    Returns:
+        The kept detections, from highest to lowest score.
+
+    Notes:
+        This is O(n^2) in time and memory: the overlap of every pair is computed up front as an n-by-n matrix in a
+        few array operations, and the greedy pass ORs one precomputed row into the suppression mask per kept
+        detection. For the few hundred candidates a detector produces this is faster than a sub-quadratic Python
+        loop. Class-aware suppression shifts every class into its own coordinate range so that all classes are
+        handled in the same pass.
+    """
+    scores = np.asarray(detections.scores)
+    boxes = np.asarray(detections.boxes, dtype=float).reshape(-1, 4)
+    if len(scores) < 2:
+        return detections
+    order = np.argsort(-scores, kind="stable")
+    shifted = boxes[order]
+    if class_aware:
+        span = boxes.max() - boxes.min() + 1
+        shifted = shifted + (np.asarray(detections.classes, dtype=float)[order] * span)[:, None]
+    areas = np.prod(np.clip(shifted[:, 2:] - shifted[:, :2], 0, None), axis=1)
+    ymin, xmin, ymax, xmax = shifted.T
+    heights = np.minimum.outer(ymax, ymax) - np.maximum.outer(ymin, ymin)
+    widths = np.minimum.outer(xmax, xmax) - np.maximum.outer(xmin, xmin)
+    intersection = np.maximum(heights, 0, out=heights) * np.maximum(widths, 0, out=widths)
+    union = np.add.outer(areas, areas) - intersection
+    overlapping = intersection > iou_threshold * np.maximum(union, 1e-12, out=union)
+    suppressed = np.zeros(len(order), dtype=bool)
+    kept = []
+    for i in range(len(order)):
+        if not suppressed[i]:
+            kept.append(i)
+            suppressed |= overlapping[i]
+    keep = order[kept]
+    return Detections(scores[keep], boxes[keep], np.asarray(detections.classes)[keep])
+
+
+def changed(previous: Optional[np.ndarray], current: np.ndarray, tolerance: float) -> bool:
+    """
+    Check whether normalized detections differ from the ones published before.
+    Args:
+        previous: The normalized detections published before, or None if there were none.
+        current: The normalized detections to compare.
+        tolerance: The largest difference in any coordinate, in pixels, or confidence, in percent, which still
+            counts as unchanged. Every message counts as changed if it is negative.
+
+    Returns:
+        Whether the detections changed.
+    """
+    if tolerance < 0 or previous is None or previous.shape != current.shape:
+        return True
+    return bool(len(current)) and float(np.abs(current - previous).max()) > tolerance
+
+
+def humanize(normalized: np.ndarray, t1: int, t2: int, freq: float) -> dict:
     """
     Convert processed values to readable output.
     Args:
@@ -86,8 +153,27 @@ def humanize(normalized: list, t1: int, t2: int, freq: float) -> dict:
     }
 
 
-def publish(message: dict, publish_enabled: bool, key: str, publisher: Callable[[str, str], None], debug_enabled: bool,
-            logger: Callable[[str], None], show_enabled: bool, image: np.ndarray, avg_fps: float):
+def serialize(message: dict) -> dict:
+    """
+    Convert a humanized message into plain Python types, ready to be serialized.
+    Args:
+        message: Dictionary message.
+
+    Returns:
+        A copy of the message with the detections as lists of integer coordinates and a confidence.
+    """
+    detections = message["detections"]
+    return dict(message, detections=[
+        coordinates + [confidence] for coordinates, confidence in zip(
+            detections[:, :4].astype(int).tolist(),
+            detections[:, 4].tolist()
+        )
+    ])
+
+
+def publish(message: dict, publish_enabled: bool, key: str, publisher: Callable[[str, Any], None], debug_enabled: bool,
+            logger: Callable[[str], None], show_enabled: bool, image: np.ndarray, avg_fps: float,
+            window: str = "debug", wire_format: str = "json"):
     """
     Publish results to NetworkTables, run debug logging and show the results in one fell swoop.
     
@@ -101,15 +187,21 @@ def publish(message: dict, publish_enabled: bool, key: str, publisher: Callable[
         show_enabled: Whether to show the information.
         image: Image to write rectangles to.
         avg_fps: Average FPS to be written in corner of frame.
+        window: Name of the window to show the results in. Defaults to "debug".
+        wire_format: How to encode the message; one of "json", "raw" or "numbers". Defaults to "json".
     """
-    for i in message["detections"]:
-        i[4] = round(i[4], 1)
-    jsonified: str = json.dumps(message)
+    if wire_format == "raw":
+        payload = wire.encode(message)
+    elif wire_format == "numbers":
+        payload = wire.encode_numbers(message)
+    else:
+        payload = json.dumps(serialize(message))
     if publish_enabled:
-        publisher(key, jsonified)
+        publisher(key, payload)
     if debug_enabled:
-        logger(jsonified)
+        logger(payload if wire_format == "json" else json.dumps(serialize(message)))
     if show_enabled:
+        message = serialize(message)
         if len(message["detections"]) > 0:
             for i in message["detections"]:
                 cv2.rectangle(image, (i[0], i[1]), (i[2], i[3]), (255, 0, 0), 2)
@@ -118,7 +210,7 @@ def publish(message: dict, publish_enabled: bool, key: str, publisher: Callable[
                 label_ymin = max(i[3], label_size[1] + 10)
                 cv2.putText(image, label, (i[2], label_ymin - 12), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 0, 0), 2)
         cv2.putText(image, f"FPS: {round(avg_fps, 1)}", (30, 50), cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 0, 0), 2)
-        cv2.imshow("debug", image)
+        cv2.imshow(window, image)
         if cv2.waitKey(1) & 0xFF == ord("q"):
             raise EOFError()
-    return jsonified
+    return payload
@@ -0,0 +1,148 @@
+"""Compact binary detection messages for MLRun.
+
+Detections can be published as JSON strings, as packed bytes or as number arrays. Both binary forms carry the same
+content as the JSON form: the FPS and, for each detection, (xmax, ymax, xmin, ymin, confidence). Only the encoders
+need NumPy. Decoding only needs the standard library, and the module imports nothing else from MLRun, so robot
+code can copy this file on its own.
+
+Packed bytes are little-endian: a header of the schema version (uint8), reserved flags (uint8), the amount of
+detections (uint16) and the FPS (float32), followed by five uint16 per detection. Pixel coordinates are whole
+numbers, and the confidence percentage is stored in tenths.
+
+Number arrays are [version, fps, count] followed by five numbers per detection, with the confidence as a percentage.
+
+Publishers which can only send bytes, such as UDP datagrams and shared memory, pack each key and value into a single
+entry with pack_entry, and consumers read it back with unpack_entry.
+"""
+import struct
+from typing import Any, List, Sequence, Tuple, Union
+
+SCHEMA_VERSION = 1
+SCHEMA = f"mlrun.detections.v{SCHEMA_VERSION}"
+FORMATS = ("json", "raw", "numbers")
+
+_HEADER = struct.Struct("<BBHf")
+_DETECTION = struct.Struct("<5H")
+# Confidences are stored in tenths of a percent.
+_SCALE = (1, 1, 1, 1, 10)
+
+# Error messages live here rather than in mlrun.strings, so that this module stands alone.
+_VERSION_ERROR = "The detection message uses schema version {version}, but version {expected} was expected."
+_ENTRY_ERROR = "The entry for {key} has the unknown type {tag!r}."
+
+
+def encode(message: dict) -> bytes:
+    """
+    Pack a humanized message into bytes.
+    Args:
+        message: A humanized message, with the detections as an array of (xmax, ymax, xmin, ymin, confidence) rows.
+
+    Returns:
+        The packed message.
+    """
+    import numpy as np  # type: ignore
+    detections = np.asarray(message["detections"], dtype=float).reshape(-1, 5)
+    # Coordinates are already whole, non-negative pixels, and confidences are at most 1000 tenths, so every field
+    # fits without clipping.
+    fields = detections * _SCALE
+    np.rint(fields, out=fields)
+    return _HEADER.pack(SCHEMA_VERSION, 0, len(detections), message["fps"]) + fields.astype("<u2").tobytes()
+
+
+def encode_numbers(message: dict) -> List[float]:
+    """
+    Flatten a humanized message into a number array.
+    Args:
+        message: A humanized message, with the detections as an array of (xmax, ymax, xmin, ymin, confidence) rows.
+
+    Returns:
+        The flattened message.
+    """
+    import numpy as np  # type: ignore
+    detections = np.asarray(message["detections"], dtype=float).reshape(-1, 5)
+    return [float(SCHEMA_VERSION), float(message["fps"]), float(len(detections))] + detections.ravel().tolist()
+
+
+def decode(data: Union[bytes, Sequence[float]]) -> dict:
+    """
+    Unpack a message published as packed bytes or as a number array.
+    Args:
+        data: The value read from NetworkTables.
+
+    Returns:
+        A dictionary in the same form as the JSON messages.
+
+    Raises:
+        ValueError: If the message was written with another schema version.
+    """
+    if isinstance(data, (bytes, bytearray)):
+        version, _, count, fps = _HEADER.unpack_from(data)
+        detections = [
+            [xmax, ymax, xmin, ymin, confidence / 10]
+            for xmax, ymax, xmin, ymin, confidence in _DETECTION.iter_unpack(
+                data[_HEADER.size:_HEADER.size + count * _DETECTION.size]
+            )
+        ]
+        fps = round(fps, 1)
+    else:
+        version, fps, count = int(data[0]), data[1], int(data[2])
+        detections = [
+            [int(value) for value in data[i:i + 4]] + [data[i + 4]]
+            for i in range(3, 3 + count * 5, 5)
+        ]
+    if version != SCHEMA_VERSION:
+        raise ValueError(_VERSION_ERROR.format(version=version, expected=SCHEMA_VERSION))
+    return {"fps": fps, "numDetections": count, "detections": detections}
+
+
+def pack_entry(key: str, value: Any) -> bytes:
+    """
+    Pack a key and a value for publishers which send bytes, such as UDP datagrams or shared memory slots.
+
+    The key is followed by a zero byte and a one-letter type tag: "s" for a UTF-8 string, "r" for raw bytes, "b" for
+    a boolean, "d" for a little-endian double and "a" for an array of them.
+    Args:
+        key: The key of the value.
+        value: A string, bytes, a boolean, a number or a sequence of numbers.
+
+    Returns:
+        The packed entry.
+    """
+    if isinstance(value, str):
+        tag, payload = b"s", value.encode("utf-8")
+    elif isinstance(value, (bytes, bytearray)):
+        tag, payload = b"r", bytes(value)
+    elif isinstance(value, bool):
+        tag, payload = b"b", bytes((value,))
+    elif isinstance(value, (int, float)):
+        tag, payload = b"d", struct.pack("<d", value)
+    else:
+        tag, payload = b"a", struct.pack(f"<{len(value)}d", *value)
+    return key.encode("utf-8") + b"\0" + tag + payload
+
+
+def unpack_entry(data: bytes) -> Tuple[str, Any]:
+    """
+    Unpack an entry packed by pack_entry.
+    Args:
+        data: The packed entry.
+
+    Returns:
+        The key and the value.
+
+    Raises:
+        ValueError: If the entry has an unknown type tag.
+    """
+    end = data.index(b"\0")
+    key, tag, payload = data[:end].decode("utf-8"), data[end + 1:end + 2], data[end + 2:]
+    if tag == b"s":
+        return key, payload.decode("utf-8")
+    if tag == b"b":
+        return key, bool(payload[0])
+    if tag == b"d":
+        return key, struct.unpack("<d", payload)[0]
+    if tag == b"a":
+        return key, list(struct.unpack(f"<{len(payload) // 8}d", payload))
+    if tag != b"r":
+        raise ValueError(_ENTRY_ERROR.format(key=key, tag=tag))
+    return key, bytes(payload)
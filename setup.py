@@ -90,6 +90,6 @@ setup(
     python_requires=">3.5",
     entry_points="""
         [console_scripts]
-        mlrun=mlrun.__main__:main
+        mlrun=mlrun.__main__:cli
     """
 )
\ No newline at end of file
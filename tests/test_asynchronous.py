@@ -0,0 +1,134 @@
+"""Tests for the asynchronous publisher wrapper."""
+import threading
+import time
+
+import pytest  # type: ignore
+
+from mlrun.publishers.asynchronous import AsyncPublisher
+from mlrun.publishers.base import BasePublisher
+
+
+class SlowPublisher(BasePublisher):
+    """Records every flushed batch, and holds up flushes until released, like a stalled connection."""
+
+    def __init__(self):
+        super().__init__()
+        self.values = {}
+        self.batches = []
+        self.flushing = threading.Event()
+        self.release = threading.Event()
+        self.enabled = self.disabled = False
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.disabled = True
+
+    def put(self, key, value):
+        self.values[key] = value
+
+    def flush(self):
+        self.flushing.set()
+        assert self.release.wait(5)
+        self.batches.append(dict(self.values))
+        self.values.clear()
+
+
+def wait_for(condition):
+    deadline = time.monotonic() + 5
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.001)
+
+
+@pytest.fixture
+def publishers():
+    slow = SlowPublisher()
+    publisher = AsyncPublisher(slow)
+    publisher.enable()
+    yield slow, publisher
+    slow.release.set()
+    publisher.disable()
+
+
+def test_latest_batch_wins_while_the_sender_is_stalled(publishers):
+    slow, publisher = publishers
+    publisher.put("detections", 1)
+    publisher.flush()
+    # The sender is now stuck in the first flush; the next batches pile up behind it.
+    assert slow.flushing.wait(5)
+    for value in (2, 3, 4):
+        publisher.put("detections", value)
+        publisher.put("fps", value * 10)
+        publisher.flush()
+    assert publisher.dropped == 2
+    slow.release.set()
+    wait_for(lambda: publisher.sent == 2)
+    assert slow.batches == [{"detections": 1}, {"detections": 4, "fps": 40}]
+    assert publisher.dropped == 2
+
+
+def test_keys_of_merged_batches_are_never_lost(publishers):
+    slow, publisher = publishers
+    publisher.put("detections", 1)
+    publisher.flush()
+    assert slow.flushing.wait(5)
+    # The keys written once at start-up and now and then must survive batches flushed after them.
+    publisher.put("jetson/schema", "mlrun.detections.v1")
+    publisher.put("jetson/enabled", True)
+    publisher.flush()
+    publisher.put("detections", 2)
+    publisher.flush()
+    publisher.put("jetson/stats", "{}")
+    publisher.put("detections", 3)
+    publisher.flush()
+    slow.release.set()
+    wait_for(lambda: publisher.sent == 2)
+    assert slow.batches[1] == {"jetson/schema": "mlrun.detections.v1", "jetson/enabled": True, "jetson/stats": "{}",
+                               "detections": 3}
+
+
+def test_only_the_last_value_of_a_key_is_sent(publishers):
+    slow, publisher = publishers
+    slow.release.set()
+    for value in range(5):
+        publisher.put("detections", value)
+    publisher.flush()
+    wait_for(lambda: publisher.sent == 1)
+    assert slow.batches == [{"detections": 4}]
+
+
+def test_flush_never_waits_for_the_sender(publishers):
+    slow, publisher = publishers
+    start = time.monotonic()
+    for value in range(100):
+        publisher.put("detections", value)
+        publisher.flush()
+    assert time.monotonic() - start < 1
+    assert slow.batches == []
+
+
+def test_disable_sends_what_is_left():
+    slow = SlowPublisher()
+    slow.release.set()
+    publisher = AsyncPublisher(slow)
+    publisher.enable()
+    publisher.put("detections", 1)
+    publisher.disable()
+    assert slow.batches == [{"detections": 1}]
+    assert slow.disabled
+
+
+def test_sender_errors_are_raised_on_flush():
+    class FailingPublisher(SlowPublisher):
+        def flush(self):
+            raise ConnectionError("gone")
+
+    publisher = AsyncPublisher(FailingPublisher())
+    publisher.enable()
+    publisher.put("detections", 1)
+    publisher.flush()
+    wait_for(lambda: publisher._error is not None)
+    with pytest.raises(ConnectionError):
+        publisher.flush()
@@ -0,0 +1,50 @@
+"""Tests for publishing through several publishers at once."""
+import pytest  # type: ignore
+
+pytest.importorskip("networktables")
+
+from mlrun.publishers.fanout import FanOutPublisher  # noqa: E402
+from mlrun.publishers.networktables import NetworkTablesPublisher  # noqa: E402
+from mlrun.publishers.udp import UDPPublisher  # noqa: E402
+
+
+@pytest.fixture
+def publishers():
+    nt = NetworkTablesPublisher()
+    return nt, FanOutPublisher([nt, UDPPublisher()])
+
+
+def paused(publisher):
+    # The same check the main loop holds capture back with.
+    return bool(publisher.is_connected() and publisher.is_enabled())
+
+
+def test_udp_does_not_count_as_a_robot_connection(publishers):
+    nt, fanout = publishers
+    assert fanout.is_connected() is False
+    # Our own write of the enabled flag comes back through the local listener, but no robot is connected.
+    nt._enabled_listener(None, "jetson/enabled", True, True)
+    assert not paused(fanout)
+
+
+def test_networktables_answers_for_the_robot(publishers):
+    nt, fanout = publishers
+    nt.connected = True
+    assert fanout.is_connected() is True
+    assert not paused(fanout)
+    nt.enabled = True
+    assert paused(fanout)
+
+
+def test_publishers_without_a_robot_connection_have_no_opinion():
+    fanout = FanOutPublisher([UDPPublisher(), UDPPublisher(port=5801)])
+    assert fanout.is_connected() is None
+    assert fanout.is_enabled() is None
+    assert not paused(fanout)
+
+
+def test_first_requested_model_wins(publishers):
+    nt, fanout = publishers
+    assert fanout.requested_model() == ""
+    nt.model = "v3tpu"
+    assert fanout.requested_model() == "v3tpu"
@@ -0,0 +1,60 @@
+"""Tests for skipping inference on frames which barely changed."""
+import numpy as np  # type: ignore
+
+from mlrun.gating import MotionGate
+from mlrun.tracking import DetectionScheduler, Tracker, update_tracks
+from mlrun.util import Detections
+
+
+def grey(level):
+    return np.full((48, 64, 3), level, dtype=np.uint8)
+
+
+def test_first_frame_is_always_inferred():
+    assert MotionGate().changed(grey(0))
+
+
+def test_differences_up_to_the_threshold_are_skipped():
+    gate = MotionGate(threshold=4.0)
+    gate.changed(grey(100))
+    assert not gate.changed(grey(104))
+    assert gate.changed(grey(105))
+
+
+def test_small_changes_add_up_against_the_last_inferred_frame():
+    gate = MotionGate(threshold=4.0)
+    gate.changed(grey(100))
+    # Each frame is close to the one before, but the reference stays at the last inferred frame.
+    assert [gate.changed(grey(level)) for level in (102, 104, 106)] == [False, False, True]
+
+
+def test_local_motion_counts_over_the_whole_thumbnail():
+    gate = MotionGate(threshold=4.0)
+    frame = grey(0)
+    gate.changed(frame)
+    moved = frame.copy()
+    # A white object over a sixteenth of the frame raises the mean difference by about 16 grey levels.
+    moved[:12, :16] = 255
+    assert gate.changed(moved)
+
+
+def test_inference_is_forced_after_max_skip_frames():
+    gate = MotionGate(max_skip=3)
+    gate.changed(grey(0))
+    assert [gate.changed(grey(0)) for _ in range(8)] == [False, False, False, True, False, False, False, True]
+
+
+def test_gated_frames_leave_the_tracker_alone():
+    gate = MotionGate(max_skip=100)
+    tracker = Tracker()
+    scheduler = DetectionScheduler()
+    box = np.array([[0.1, 0.1, 0.3, 0.3]])
+    cached = None
+    for step, level in enumerate((0, 50, 50, 50)):
+        changed = gate.changed(grey(level))
+        if changed:
+            cached = Detections(np.array([0.9]), box + 0.01 * step, np.array([1.0]))
+        update_tracks([tracker], scheduler, [cached], [changed])
+    # The still frames reused the detections of the moving one, which set the velocity and is still kept.
+    np.testing.assert_allclose(tracker.velocities, [[0.01] * 4])
+    np.testing.assert_allclose(tracker.boxes, box + 0.01)
@@ -0,0 +1,65 @@
+"""Tests for the background frame grabber."""
+import threading
+
+import numpy as np  # type: ignore
+import pytest  # type: ignore
+
+from mlrun.cameras.base import BaseCamera
+from mlrun.cameras.grabber import GrabberCamera
+
+
+class StallingCamera(BaseCamera):
+    """Delivers frames only while allowed to, and otherwise stalls like an unplugged camera."""
+
+    def __init__(self):
+        self.frames = 0
+        self.flowing = threading.Event()
+
+    def enable(self):
+        pass
+
+    def disable(self):
+        pass
+
+    def read(self):
+        if not self.flowing.wait(0.01):
+            # Nothing, the way file cameras return nothing while rewinding.
+            return None
+        self.frames += 1
+        return np.full((2, 2, 3), self.frames, dtype=np.uint8)
+
+
+@pytest.fixture
+def grabber():
+    camera = StallingCamera()
+    grabber = GrabberCamera(camera, timeout=0.2)
+    grabber.enable()
+    yield camera, grabber
+    grabber.disable()
+
+
+def test_newest_frame_is_returned(grabber):
+    camera, grabber = grabber
+    camera.flowing.set()
+    first = grabber.read_frame()
+    second = grabber.read_frame()
+    assert second.sequence > first.sequence
+
+
+def test_stalled_camera_raises_instead_of_repeating_the_last_frame(grabber):
+    camera, grabber = grabber
+    camera.flowing.set()
+    grabber.read_frame()
+    camera.flowing.clear()
+    # Let a frame read before the stall go by.
+    try:
+        grabber.read_frame()
+    except EOFError:
+        pass
+    with pytest.raises(EOFError):
+        grabber.read()
+
+
+def test_camera_which_never_delivers_raises(grabber):
+    with pytest.raises(EOFError):
+        grabber[1].read()
@@ -0,0 +1,152 @@
+"""Tests for reloading models which changed on disk."""
+import logging
+import os
+import time
+
+import numpy as np  # type: ignore
+import pytest  # type: ignore
+
+from mlrun.engines.base import BaseEngine, ModelFile
+from mlrun.engines.hotswap import HotSwapEngine
+
+
+class FileEngine(BaseEngine):
+    """Loads a text file as its model, and fails to on a file reading "broken"."""
+
+    def __init__(self, path, loads):
+        super().__init__()
+        self.path = path
+        self.loads = loads
+        self.model_file = None
+        self.disabled = False
+        self.invoked = 0
+
+    def enable(self):
+        self.model_file = ModelFile(self.path)
+        self.loads.append(self.path)
+        with open(self.path) as handle:
+            if handle.read() == "broken":
+                raise ValueError("broken model")
+
+    def disable(self):
+        self.disabled = True
+
+    def invoke(self, tensor):
+        assert not self.disabled
+        self.invoked += 1
+        return self.path
+
+    def model_changed(self):
+        return self.model_file is not None and self.model_file.changed()
+
+    def model_signature(self):
+        return self.model_file.current() if self.model_file is not None else None
+
+
+def rewrite(path, content):
+    # Replace the file in one step, the way models are deployed. Its modification time is moved on explicitly, since
+    # rewrites within one clock tick would not change it.
+    stat = os.stat(path)
+    with open(path + ".tmp", "w") as handle:
+        handle.write(content)
+    os.utime(path + ".tmp", ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    os.replace(path + ".tmp", path)
+
+
+def wait_for(condition):
+    deadline = time.monotonic() + 5
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.001)
+
+
+def settle(engine):
+    time.sleep(0.2)
+    if engine._loading is not None:
+        engine._loading.join()
+
+
+@pytest.fixture
+def watched(tmp_path):
+    path = str(tmp_path / "model")
+    with open(path, "w") as handle:
+        handle.write("good")
+    loads = []
+    engine = HotSwapEngine(lambda model: FileEngine(model, loads), path, watch_interval=0.01,
+                           logger=logging.getLogger("test"))
+    engine.enable()
+    yield engine, path, loads
+    engine.disable()
+
+
+def test_changed_model_is_reloaded(watched):
+    engine, path, loads = watched
+    rewrite(path, "better")
+    settle(engine)
+    assert engine.swaps == 1
+    assert len(loads) == 2
+
+
+def test_failed_reload_waits_for_the_next_change(watched):
+    engine, path, loads = watched
+    rewrite(path, "broken")
+    settle(engine)
+    assert engine.swaps == 0
+    assert len(loads) == 2
+    # The failed version is left alone, however many times the watcher wakes up.
+    settle(engine)
+    assert len(loads) == 2
+    rewrite(path, "fixed")
+    settle(engine)
+    assert engine.swaps == 1
+    assert len(loads) == 3
+
+
+@pytest.fixture
+def models(tmp_path):
+    for name, content in (("v3", "good"), ("v4", "good"), ("broken", "broken")):
+        with open(tmp_path / name, "w") as handle:
+            handle.write(content)
+    loads = []
+    engine = HotSwapEngine(lambda model: FileEngine(model, loads), str(tmp_path / "v3"),
+                           logger=logging.getLogger("test"))
+    engine.enable()
+    yield engine, tmp_path
+    engine.disable()
+
+
+def test_old_engine_is_disabled_only_once_pinned_frames_are_invoked(models):
+    engine, directory = models
+    old = engine.engine
+    pinned = engine.preprocess(np.zeros((2, 2, 3)))
+    assert engine.request("v4")
+    wait_for(lambda: engine.swaps == 1)
+    assert engine.path == str(directory / "v4")
+    # The swap is done, but the frame preprocessed before it still holds the old engine.
+    time.sleep(0.1)
+    assert not old.disabled
+    assert engine.invoke(pinned) == str(directory / "v3")
+    engine._loading.join(5)
+    assert old.disabled
+    # New frames run on the new engine.
+    assert engine.invoke(engine.preprocess(np.zeros((2, 2, 3)))) == str(directory / "v4")
+
+
+def test_requests_only_swap_when_they_change(models):
+    engine, directory = models
+    assert not engine.request("")
+    assert not engine.request("v3")
+    assert engine.request("v4")
+    engine._loading.join(5)
+    assert not engine.request("v4")
+    assert engine.swaps == 1
+
+
+def test_failed_request_keeps_the_current_model_and_is_not_retried(models):
+    engine, directory = models
+    assert engine.request("broken")
+    engine._loading.join(5)
+    assert engine.swaps == 0
+    assert engine.path == str(directory / "v3")
+    assert not engine.engine.disabled
+    assert not engine.request("broken")
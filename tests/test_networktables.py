@@ -0,0 +1,77 @@
+"""Tests for rate-limited NetworkTables writes, without a NetworkTables server."""
+import time
+
+import pytest  # type: ignore
+
+pytest.importorskip("networktables")
+
+from mlrun.publishers import networktables  # noqa: E402
+from mlrun.publishers.asynchronous import AsyncPublisher  # noqa: E402
+
+
+class RecordingTable:
+    """Keeps the last value written to each key, like a table nobody else writes to."""
+
+    def __init__(self):
+        self.values = {}
+
+    def putString(self, key, value):
+        self.values[key] = value
+
+    putRaw = putBoolean = putNumber = putNumberArray = putString
+
+
+class Client:
+    @staticmethod
+    def flush():
+        pass
+
+
+@pytest.fixture
+def rate_limited(monkeypatch):
+    monkeypatch.setattr(networktables, "NetworkTables", Client, raising=False)
+    publisher = networktables.NetworkTablesPublisher(rate=10.0)
+    table = RecordingTable()
+    publisher.table = table
+    monkeypatch.setattr(publisher, "enable", lambda: table)
+    monkeypatch.setattr(publisher, "disable", lambda: None)
+    return publisher, table
+
+
+def wait_for(condition):
+    deadline = time.monotonic() + 5
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.001)
+
+
+def test_values_deferred_by_the_rate_are_written_once_due(rate_limited):
+    publisher, table = rate_limited
+    publisher.put("d", "A")
+    publisher.flush()
+    publisher.put("d", "B")
+    publisher.flush()
+    assert table.values == {"d": "A"}
+    time.sleep(0.1)
+    publisher.flush()
+    assert table.values == {"d": "B"}
+
+
+def test_deferred_values_are_written_behind_the_asynchronous_publisher(rate_limited):
+    nt, table = rate_limited
+    publisher = AsyncPublisher(nt)
+    publisher.enable()
+    try:
+        publisher.put("d", "A")
+        publisher.flush()
+        wait_for(lambda: table.values.get("d") == "A")
+        publisher.put("d", "B")
+        publisher.flush()
+        # Later frames write nothing, as when the detections stop moving, yet the deferred value still goes out.
+        deadline = time.monotonic() + 1
+        while table.values["d"] != "B" and time.monotonic() < deadline:
+            publisher.flush()
+            time.sleep(0.01)
+        assert table.values == {"d": "B"}
+    finally:
+        publisher.disable()
@@ -0,0 +1,82 @@
+"""Tests for the staged pipeline and its queues."""
+import itertools
+import queue
+import threading
+import time
+
+import pytest  # type: ignore
+
+from mlrun.pipeline import DropOldestQueue, Pipeline
+
+
+def test_full_queue_drops_its_oldest_item():
+    items = DropOldestQueue(2)
+    assert not items.put(1)
+    assert not items.put(2)
+    assert items.put(3)
+    assert items.dropped == 1
+    assert [items.get(), items.get()] == [2, 3]
+    with pytest.raises(queue.Empty):
+        items.get(timeout=0.01)
+
+
+def test_get_waits_for_an_item():
+    items = DropOldestQueue()
+    threading.Timer(0.05, items.put, args=("late",)).start()
+    assert items.get(timeout=5) == "late"
+
+
+def run_until(pipeline, published, amount):
+    def publish(result):
+        published.append(result)
+        if len(published) == amount:
+            pipeline.stop()
+
+    pipeline.publish = publish
+    pipeline.run()
+
+
+def test_results_keep_capture_order_with_several_workers():
+    frames = itertools.count()
+
+    def capture():
+        time.sleep(0.002)
+        return next(frames)
+
+    def infer(frame):
+        # Every other frame takes much longer, so later frames routinely finish first.
+        time.sleep(0.03 if frame % 2 else 0.001)
+        return frame
+
+    published = []
+    pipeline = Pipeline(capture, infer, None, queue_size=4, workers=4)
+    run_until(pipeline, published, 40)
+    assert len(published) >= 40
+    assert published == sorted(set(published))
+
+
+def test_slow_inference_gets_the_freshest_frame():
+    frames = itertools.count()
+
+    def capture():
+        time.sleep(0.001)
+        return next(frames)
+
+    def infer(frame):
+        time.sleep(0.03)
+        return frame
+
+    published = []
+    pipeline = Pipeline(capture, infer, None)
+    run_until(pipeline, published, 5)
+    # Frames captured while inference was busy were dropped rather than queued up.
+    assert published[-1] - published[0] > len(published)
+    assert pipeline.captured.dropped > 0
+
+
+def test_stage_errors_are_raised_by_run():
+    def capture():
+        raise EOFError()
+
+    with pytest.raises(EOFError):
+        Pipeline(capture, lambda frame: frame, lambda result: None).run()
@@ -0,0 +1,86 @@
+"""Tests for compiling and caching TensorFlow graphs, on a tiny SavedModel and the CPU."""
+import os
+import sys
+
+import numpy as np  # type: ignore
+import pytest  # type: ignore
+
+tf = pytest.importorskip("tensorflow").compat.v1
+
+from mlrun.engines.tensorflow import TensorFlowEngine  # noqa: E402
+
+
+@pytest.fixture
+def saved_model(tmp_path):
+    """A SavedModel with the detection outputs of a real one, fed raw frames."""
+    path = str(tmp_path / "model")
+    graph = tf.Graph()
+    with graph.as_default():
+        images = tf.placeholder(tf.uint8, [None, None, None, 3], name="image_tensor")
+        means = tf.reduce_mean(tf.cast(images, tf.float32), axis=[1, 2])
+        weights = tf.Variable(tf.ones([3, 4]) * 0.001, name="weights")
+        # Compiling has to prune this, since no output depends on it.
+        tf.Variable(tf.zeros([8, 8]), name="unused")
+        scores = tf.identity(tf.sigmoid(tf.matmul(means, weights)), name="detection_scores")
+        boxes = tf.identity(tf.tile(tf.expand_dims(scores, -1), [1, 1, 4]) * 0.5, name="detection_boxes")
+        classes = tf.identity(tf.ones_like(scores), name="detection_classes")
+        with tf.Session(graph=graph) as session:
+            session.run(tf.global_variables_initializer())
+            tf.saved_model.simple_save(session, path, {"image_tensor": images},
+                                       {"scores": scores, "boxes": boxes, "classes": classes})
+    return path
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return str(tmp_path / "cache")
+
+
+def infer(engine):
+    engine.enable()
+    try:
+        return engine.invoke(engine.preprocess(np.full((32, 48, 3), 200, dtype=np.uint8)))
+    finally:
+        engine.disable()
+
+
+def cached(cache):
+    return sorted(name.rsplit("-", 1)[1] for name in os.listdir(cache))
+
+
+def never_compile(engine):
+    engine._compile = lambda: pytest.fail("compiled a cached graph")
+    return engine
+
+
+def test_frozen_graph_is_cached_and_reused(saved_model, cache):
+    expected = infer(TensorFlowEngine(saved_model))
+    compiled = infer(TensorFlowEngine(saved_model, "frozen", cache))
+    assert cached(cache) == ["frozen.pb"]
+    reused = infer(never_compile(TensorFlowEngine(saved_model, "frozen", cache)))
+    for result in (compiled, reused):
+        for actual, wanted in zip(result, expected):
+            np.testing.assert_allclose(actual, wanted, rtol=1e-6)
+
+
+def test_trt_fallback_is_cached_as_frozen(saved_model, cache, monkeypatch):
+    # Importing a module mapped to None raises ImportError, as it does where TF-TRT is not built in.
+    monkeypatch.setitem(sys.modules, "tensorflow.python.compiler.tensorrt.trt_convert", None)
+    infer(TensorFlowEngine(saved_model, "trt", cache))
+    assert cached(cache) == ["frozen.pb"]
+    # Both requests are served by the fallback from now on.
+    infer(never_compile(TensorFlowEngine(saved_model, "trt", cache)))
+    infer(never_compile(TensorFlowEngine(saved_model, "frozen", cache)))
+
+
+def test_trt_graph_is_preferred_over_the_fallback(saved_model, cache):
+    infer(TensorFlowEngine(saved_model, "frozen", cache))
+    frozen = os.path.join(cache, os.listdir(cache)[0])
+    # A copy of the frozen graph stands in for a TF-TRT one, and the fallback is broken so that loading it fails.
+    with open(frozen, "rb") as source:
+        content = source.read()
+    with open(frozen.replace("-frozen.pb", "-trt.pb"), "wb") as target:
+        target.write(content)
+    with open(frozen, "wb") as target:
+        target.write(b"not a graph")
+    infer(never_compile(TensorFlowEngine(saved_model, "trt", cache)))
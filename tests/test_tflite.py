@@ -0,0 +1,165 @@
+"""Tests for the TensorFlow Lite engine."""
+import os
+import tracemalloc
+
+import numpy as np  # type: ignore
+import pytest  # type: ignore
+
+from mlrun import bench, strings
+from mlrun.engines.tflite import TFLiteEngine
+
+
+class StubDelegate:
+    """Stands in for the Edge TPU delegate of one device."""
+
+    def __init__(self, device: str):
+        self.device = device
+
+
+class StubInterpreter:
+    """Stands in for an interpreter with an 8x8 input and the four outputs of a detection model."""
+
+    def __init__(self, model_path=None, model_content=None, num_threads=None, experimental_delegates=(),
+                 failing=(), broken=False, dtype=np.uint8, count=2):
+        self.device = experimental_delegates[0].device if experimental_delegates else ""
+        self.failing = failing
+        self.broken = broken
+        self.invoked = 0
+        self.input = np.zeros((1, 8, 8, 3), dtype=dtype)
+        self.outputs = [np.zeros((1, 2, 4), np.float32), np.zeros((1, 2), np.float32), np.zeros((1, 2), np.float32),
+                        np.array([count], np.float32)]
+
+    def allocate_tensors(self):
+        pass
+
+    def get_input_details(self):
+        return [{"index": 0, "shape": np.array([1, 8, 8, 3]), "dtype": self.input.dtype.type}]
+
+    def get_output_details(self):
+        return [{"index": i + 1} for i in range(4)]
+
+    def set_tensor(self, index, value):
+        # Like TFLite, refuse values of the wrong type.
+        if value.dtype != self.input.dtype:
+            raise ValueError(f"Got value of type {value.dtype} but expected type {self.input.dtype}")
+        self.input[...] = value
+
+    def tensor(self, index):
+        def view():
+            if self.broken and index > 0:
+                raise ValueError("not a device error")
+            return self.input if index == 0 else self.outputs[index - 1]
+        return view
+
+    def invoke(self):
+        if self.device in self.failing:
+            raise RuntimeError(f"{self.device} was unplugged")
+        self.invoked += 1
+        # Score the first input channel, so results show what arrived in the input tensor.
+        self.outputs[2][0, 0] = self.input[0, ..., 0].mean()
+
+
+@pytest.fixture
+def edgetpu_model(tmp_path):
+    (tmp_path / "model_edgetpu.tflite").write_bytes(b"")
+    return str(tmp_path)
+
+
+def make_engine(path, devices="usb:0,usb:1", failing=(), unusable=(), broken=False, dtype=np.uint8, count=2):
+    created = []
+
+    def interpreter_factory(**kwargs):
+        created.append(StubInterpreter(failing=failing, broken=broken, dtype=dtype, count=count, **kwargs))
+        return created[-1]
+
+    def delegate_factory(device):
+        if device in unusable:
+            raise ValueError(f"{device} is missing")
+        return StubDelegate(device)
+
+    engine = TFLiteEngine(path, devices=devices, interpreter_factory=interpreter_factory,
+                          delegate_factory=delegate_factory)
+    engine.enable()
+    return engine, created
+
+
+def frame(red: int) -> np.ndarray:
+    image = np.zeros((8, 8, 3), dtype=np.uint8)
+    image[..., 2] = red
+    return image
+
+
+def test_one_interpreter_per_device(edgetpu_model):
+    engine, created = make_engine(edgetpu_model)
+    assert [interpreter.device for interpreter in created] == ["usb:0", "usb:1"]
+    assert sorted(engine.device_names.values()) == ["usb:0", "usb:1"]
+    engine.disable()
+
+
+def test_unusable_devices_are_skipped(edgetpu_model):
+    engine, created = make_engine(edgetpu_model, unusable=("usb:1",))
+    assert list(engine.device_names.values()) == ["usb:0"]
+    engine.disable()
+
+
+def test_failed_device_is_retired_and_input_retried(edgetpu_model):
+    engine, created = make_engine(edgetpu_model, failing=("usb:0",))
+    # The input is converted to RGB on its way into the tensor, so the red channel comes first.
+    assert engine.invoke(engine.preprocess(frame(200))).scores[0] == 200
+    assert engine._healthy == 1
+    assert engine.invoke(engine.preprocess(frame(100))).scores[0] == 100
+    assert [interpreter.invoked for interpreter in created] == [0, 2]
+    engine.disable()
+
+
+def test_every_device_failing_stops_inference(edgetpu_model):
+    engine, _ = make_engine(edgetpu_model, failing=("usb:0", "usb:1"))
+    with pytest.raises(RuntimeError, match=strings.tflite_no_devices_left):
+        engine.invoke(engine.preprocess(frame(1)))
+    engine.disable()
+
+
+def test_other_errors_do_not_retire_devices(edgetpu_model):
+    engine, _ = make_engine(edgetpu_model, broken=True)
+    for _ in range(3):
+        with pytest.raises(ValueError):
+            engine.invoke(engine.preprocess(frame(1)))
+    assert engine._healthy == 2
+    assert engine._idle.qsize() == 2
+    engine.disable()
+
+
+def test_non_uint8_inputs_are_type_checked(edgetpu_model):
+    # Converting into a float32 tensor would leave it untouched, so such inputs go through set_tensor instead.
+    engine, created = make_engine(edgetpu_model, devices="usb:0", dtype=np.float32)
+    with pytest.raises(ValueError):
+        engine.invoke(engine.preprocess(frame(1)))
+    assert created[0].invoked == 0
+    engine.disable()
+
+
+def test_only_counted_detections_are_copied(edgetpu_model):
+    engine, created = make_engine(edgetpu_model, devices="usb:0", count=1)
+    detections = engine.invoke(engine.preprocess(frame(50)))
+    assert detections.scores.tolist() == [50]
+    assert detections.boxes.shape == (1, 4) and detections.classes.shape == (1,)
+    # The results must not alias the output tensors, which the next invoke overwrites.
+    assert not np.shares_memory(detections.scores, created[0].outputs[2])
+    engine.disable()
+
+
+def test_inference_allocates_only_the_detections():
+    pytest.importorskip("tflite_runtime")
+    model = os.path.join(os.path.dirname(__file__), os.pardir, "models", "v3")
+    engine = TFLiteEngine(model)
+    engine.enable()
+    tensor = engine.preprocess(np.zeros((720, 1280, 3), dtype=np.uint8))
+    engine.invoke(tensor)
+    tracemalloc.start()
+    try:
+        allocated = max(bench.peak_allocation(lambda: engine.invoke(tensor)) for _ in range(5))
+    finally:
+        tracemalloc.stop()
+        engine.disable()
+    # Only the detections and their array headers should be allocated; a copy of the 320x320 input alone is 300 KB.
+    assert allocated < 2048
@@ -0,0 +1,40 @@
+"""Tests for merging detections across tile seams."""
+import numpy as np  # type: ignore
+
+from mlrun.tiling import merge
+from mlrun.util import Detections
+
+# Two tiles side by side, overlapping between x = 0.45 and x = 0.55, and two tiles which abut at x = 0.5.
+OVERLAPPING = np.array([[0, 0, 1, 0.55], [0, 0.45, 1, 1]])
+ABUTTING = np.array([[0, 0, 1, 0.5], [0, 0.5, 1, 1]])
+
+
+def tiles(*boxes):
+    return [Detections(np.array([0.9 - 0.1 * i]), np.array([box]), np.array([1.0])) for i, box in enumerate(boxes)]
+
+
+def test_object_seen_by_overlapping_tiles_is_merged():
+    # Tile one sees the object whole; tile two sees the part right of its border.
+    merged = merge(tiles([0.2, 0.4, 0.6, 0.5], [0.2, 0.45, 0.6, 0.5]), OVERLAPPING, 0.5)
+    assert merged.boxes.tolist() == [[0.2, 0.4, 0.6, 0.5]]
+
+
+def test_object_cut_by_abutting_tiles_is_merged():
+    merged = merge(tiles([0.2, 0.4, 0.6, 0.5], [0.25, 0.5, 0.6, 0.62]), ABUTTING, 0.5)
+    assert merged.boxes.tolist() == [[0.2, 0.4, 0.6, 0.62]]
+    assert merged.scores.tolist() == [0.9]
+
+
+def test_objects_side_by_side_across_a_seam_stay_apart():
+    # Two touching objects in the middle of the overlap; each tile sees one whole and the other cut by its border.
+    left, right = [0.2, 0.40, 0.6, 0.50], [0.2, 0.50, 0.6, 0.60]
+    merged = merge(tiles(left, [0.2, 0.50, 0.6, 0.55]) + tiles([0.2, 0.45, 0.6, 0.50], right),
+                   np.repeat(OVERLAPPING, 2, axis=0), 0.5)
+    assert sorted(merged.boxes.tolist()) == [left, right]
+    # Boxes which touch but do not both reach the seam between abutting tiles.
+    assert len(merge(tiles([0.2, 0.40, 0.6, 0.48], [0.2, 0.5, 0.6, 0.6]), ABUTTING, 0.5).scores) == 2
+
+
+def test_boxes_at_different_heights_along_a_seam_stay_apart():
+    merged = merge(tiles([0.1, 0.4, 0.3, 0.5], [0.6, 0.5, 0.8, 0.6]), ABUTTING, 0.5)
+    assert len(merged.scores) == 2
@@ -0,0 +1,76 @@
+"""Tests for carrying detections between engine runs."""
+import numpy as np  # type: ignore
+
+from mlrun.tracking import DetectionScheduler, Tracker, iou_matrix, update_tracks
+from mlrun.util import Detections
+
+
+def detections(*boxes, score=0.9, label=1.0):
+    return Detections(np.full(len(boxes), score), np.array(boxes, dtype=float).reshape(-1, 4),
+                      np.full(len(boxes), label))
+
+
+def test_iou_of_every_pair():
+    overlaps = iou_matrix(np.array([[0, 0, 0.2, 0.2], [0.5, 0.5, 0.7, 0.7]]), np.array([[0, 0.1, 0.2, 0.3]]))
+    np.testing.assert_allclose(overlaps, [[1 / 3], [0]])
+
+
+def test_tracks_move_at_the_velocity_between_detections():
+    tracker = Tracker()
+    tracker.update(detections([0.1, 0.1, 0.3, 0.3]))
+    tracker.predict()
+    # Detected again two frames later, 0.02 further right.
+    tracker.update(detections([0.1, 0.12, 0.3, 0.32]))
+    np.testing.assert_allclose(tracker.predict().boxes, [[0.1, 0.13, 0.3, 0.33]])
+    np.testing.assert_allclose(tracker.predict().boxes, [[0.1, 0.14, 0.3, 0.34]])
+
+
+def test_only_overlapping_detections_of_the_same_class_continue_a_track():
+    tracker = Tracker(iou_threshold=0.3)
+    tracker.update(Detections(np.array([0.9, 0.9]), np.array([[0.1, 0.1, 0.3, 0.3], [0.6, 0.6, 0.8, 0.8]]),
+                              np.array([1.0, 2.0])))
+    # The first box moved into the second, but changed class; the second jumped too far to overlap.
+    tracker.update(Detections(np.array([0.9, 0.9]), np.array([[0.1, 0.15, 0.3, 0.35], [0.6, 0.1, 0.8, 0.3]]),
+                              np.array([2.0, 2.0])))
+    np.testing.assert_allclose(tracker.velocities, 0)
+
+
+def test_tracks_are_dropped_after_max_age():
+    tracker = Tracker(max_age=2)
+    tracker.update(detections([0.1, 0.1, 0.3, 0.3]))
+    assert len(tracker.predict().scores) == 1
+    assert len(tracker.predict().scores) == 1
+    assert len(tracker.predict().scores) == 0
+
+
+def test_scheduler_runs_every_interval():
+    scheduler = DetectionScheduler(interval=3)
+    assert [scheduler.due() for _ in range(7)] == [True, False, False, True, False, False, True]
+
+
+def test_scheduler_runs_again_after_a_low_score():
+    scheduler = DetectionScheduler(interval=3, confidence=0.5)
+    assert scheduler.due()
+    scheduler.detected(np.array([0.9, 0.4]))
+    assert scheduler.due()
+    scheduler.detected(np.array([0.9, 0.6]))
+    assert not scheduler.due()
+    # Runs without detections are not uncertain.
+    scheduler.detected(np.empty(0))
+    assert not scheduler.due()
+
+
+def test_cameras_which_were_not_inferred_upon_keep_their_tracks():
+    moving, still = Tracker(), Tracker()
+    for tracker in (moving, still):
+        tracker.update(detections([0.1, 0.1, 0.3, 0.3]))
+    still.update(detections([0.1, 0.11, 0.3, 0.31]))
+    scheduler = DetectionScheduler(interval=2, confidence=0.5)
+    scheduler.due()
+    update_tracks([moving, still], scheduler, [detections([0.1, 0.12, 0.3, 0.32]),
+                                               detections([0.1, 0.1, 0.3, 0.3], score=0.1)], [True, False])
+    np.testing.assert_allclose(moving.velocities, [[0, 0.02, 0, 0.02]])
+    # The reused detections of the second camera neither reset its velocity nor reached the scheduler.
+    np.testing.assert_allclose(still.velocities, [[0, 0.01, 0, 0.01]])
+    assert still.scores.tolist() == [0.9]
+    assert not scheduler.due()
@@ -0,0 +1,59 @@
+"""Tests for non-maximum suppression."""
+import numpy as np  # type: ignore
+import pytest  # type: ignore
+
+from mlrun.util import Detections, non_max_suppression
+
+
+def iou(first, second):
+    height = min(first[2], second[2]) - max(first[0], second[0])
+    width = min(first[3], second[3]) - max(first[1], second[1])
+    intersection = max(height, 0) * max(width, 0)
+    union = ((first[2] - first[0]) * (first[3] - first[1]) + (second[2] - second[0]) * (second[3] - second[1]) -
+             intersection)
+    return intersection / union if union > 0 else 0.0
+
+
+def reference(detections, threshold, class_aware):
+    """Textbook greedy suppression, one pair at a time."""
+    kept = []
+    for i in sorted(range(len(detections.scores)), key=lambda i: -detections.scores[i]):
+        if not any((not class_aware or detections.classes[i] == detections.classes[j]) and
+                   iou(detections.boxes[i], detections.boxes[j]) > threshold for j in kept):
+            kept.append(i)
+    return kept
+
+
+def candidates(amount, seed):
+    random = np.random.RandomState(seed)
+    centres = random.rand(amount, 2)
+    sizes = random.rand(amount, 2) * 0.3 + 0.02
+    return Detections(random.permutation(amount) / amount,
+                      np.clip(np.concatenate([centres - sizes / 2, centres + sizes / 2], axis=1), 0, 1),
+                      random.randint(0, 3, amount).astype(float))
+
+
+@pytest.mark.parametrize("class_aware", [True, False])
+@pytest.mark.parametrize("threshold", [0.3, 0.5, 0.7])
+@pytest.mark.parametrize("seed", range(5))
+def test_matches_the_reference(class_aware, threshold, seed):
+    detections = candidates(60, seed)
+    kept = reference(detections, threshold, class_aware)
+    suppressed = non_max_suppression(detections, threshold, class_aware)
+    assert suppressed.scores.tolist() == detections.scores[kept].tolist()
+    assert suppressed.boxes.tolist() == detections.boxes[kept].tolist()
+    assert suppressed.classes.tolist() == detections.classes[kept].tolist()
+
+
+def test_only_classes_alike_suppress_each_other_when_class_aware():
+    box = [0.1, 0.1, 0.5, 0.5]
+    detections = Detections(np.array([0.9, 0.8, 0.7]), np.array([box, box, box]), np.array([1.0, 2.0, 1.0]))
+    assert non_max_suppression(detections, 0.5, True).scores.tolist() == [0.9, 0.8]
+    assert non_max_suppression(detections, 0.5, False).scores.tolist() == [0.9]
+
+
+def test_fewer_than_two_detections_are_kept_as_they_are():
+    empty = Detections(np.zeros(0), np.zeros((0, 4)), np.zeros(0))
+    assert len(non_max_suppression(empty, 0.5).scores) == 0
+    single = Detections(np.array([0.5]), np.array([[0.1, 0.1, 0.2, 0.2]]), np.array([1.0]))
+    assert non_max_suppression(single, 0.5) is single
@@ -0,0 +1,53 @@
+"""Tests for the binary detection messages shared with robot code."""
+import struct
+
+import numpy as np  # type: ignore
+import pytest  # type: ignore
+
+from mlrun import wire
+
+MESSAGE = {
+    "fps": 29.7,
+    "numDetections": 2,
+    "detections": np.array([[640.0, 360.0, 320.0, 120.0, 87.5], [1279.0, 719.0, 1.0, 1.0, 100.0]]),
+}
+EXPECTED = {"fps": 29.7, "numDetections": 2, "detections": MESSAGE["detections"].tolist()}
+
+
+def test_raw_round_trip():
+    data = wire.encode(MESSAGE)
+    assert len(data) == 8 + 2 * 10
+    assert wire.decode(data) == EXPECTED
+
+
+def test_numbers_round_trip():
+    numbers = wire.encode_numbers(MESSAGE)
+    assert numbers[:3] == [wire.SCHEMA_VERSION, 29.7, 2]
+    assert wire.decode(numbers) == EXPECTED
+
+
+@pytest.mark.parametrize("encode", [wire.encode, wire.encode_numbers])
+def test_no_detections_round_trip(encode):
+    message = {"fps": 5.0, "numDetections": 0, "detections": np.empty((0, 5))}
+    assert wire.decode(encode(message)) == {"fps": 5.0, "numDetections": 0, "detections": []}
+
+
+def test_other_schema_versions_are_refused():
+    data = bytearray(wire.encode(MESSAGE))
+    data[0] = wire.SCHEMA_VERSION + 1
+    with pytest.raises(ValueError, match="version"):
+        wire.decode(bytes(data))
+    numbers = wire.encode_numbers(MESSAGE)
+    numbers[0] = wire.SCHEMA_VERSION + 1
+    with pytest.raises(ValueError, match="version"):
+        wire.decode(numbers)
+
+
+@pytest.mark.parametrize("value", ["text", b"\x00\x01", True, False, 2.5, [1.0, 2.0, 3.0]])
+def test_entry_round_trip(value):
+    assert wire.unpack_entry(wire.pack_entry("jetson/key", value)) == ("jetson/key", value)
+
+
+def test_entries_with_unknown_types_are_refused():
+    with pytest.raises(ValueError, match="jetson/key"):
+        wire.unpack_entry(b"jetson/key\0x" + struct.pack("<d", 1.0))